@@ -0,0 +1,30 @@
+"""add selector_name and row_index to scraped elements
+
+Revision ID: c7d2e8a4f1b6
+Revises: b3a1f4d9e2c7
+Create Date: 2026-03-02 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d2e8a4f1b6"
+down_revision: Union[str, Sequence[str], None] = "b3a1f4d9e2c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("scraped_elements", sa.Column("selector_name", sa.String(), nullable=True))
+    op.add_column("scraped_elements", sa.Column("row_index", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("scraped_elements", "row_index")
+    op.drop_column("scraped_elements", "selector_name")
@@ -1,11 +1,110 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-class Settings(BaseSettings): 
+class Settings(BaseSettings):
     DATABASE_URL: str
 
+    # Headless Chrome pool shared by the preview route
+    BROWSER_POOL_SIZE: int = 2
+    BROWSER_MAX_PAGES_PER_DRIVER: int = 50
+    BROWSER_CHECKOUT_TIMEOUT: float = 30.0
+    BROWSER_WARM_ON_STARTUP: bool = True
+
+    # Rendered-HTML cache for /preview
+    PREVIEW_CACHE_TTL: float = 120.0
+    PREVIEW_CACHE_MAX_ENTRIES: int = 64
+    PREVIEW_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Dedicated render executor for /preview (workers default to BROWSER_POOL_SIZE)
+    PREVIEW_RENDER_WORKERS: Optional[int] = None
+    PREVIEW_RENDER_QUEUE_SIZE: int = 8
+    PREVIEW_RENDER_TIMEOUT: float = 20.0
+
+    # Render profile: resource types/URL patterns blocked via CDP and how long to wait
+    PREVIEW_BLOCKED_RESOURCE_TYPES: List[str] = ["image", "font", "media", "tracking"]
+    PREVIEW_BLOCKED_URL_PATTERNS: List[str] = []
+    PREVIEW_WAIT_STRATEGY: str = "domcontentloaded"
+    PREVIEW_NETWORK_IDLE_MS: int = 500
+
+    # Shared HTTP client used by static scraping and the link graph crawler
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 15.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 40
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 8
+    HTTP2_ENABLED: bool = True
+
+    # "dynamic" scrape mode (rendered with the browser pool)
+    DYNAMIC_SCRAPE_TIMEOUT: float = 20.0
+
+    # Link graph crawl politeness
+    CRAWL_PER_HOST_CONCURRENCY: int = 4
+    CRAWL_MIN_HOST_DELAY: float = 0.1
+    CRAWL_MAX_BACKOFF: float = 60.0
+    CRAWL_MAX_RETRIES: int = 2
+    CRAWL_RESPECT_ROBOTS: bool = True
+    CRAWL_MAX_PAGES: int = 100_000
+    # Crawled pages are cut off after this many (decompressed) bytes
+    CRAWL_MAX_PAGE_BYTES: int = 2 * 1024 * 1024
+    # URL dedup: "exact" (dict of strings) or "fingerprint" (hashed, bounded memory)
+    CRAWL_DEDUP: str = "exact"
+    CRAWL_DEDUP_FP_RATE: float = 1e-6
+    # URL canonicalization: query params dropped before dedup (wildcards allowed)
+    CRAWL_STRIP_QUERY_PARAMS: List[str] = [
+        "utm_*", "gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "_ga", "_hsenc", "_hsmi",
+    ]
+    CRAWL_COLLAPSE_INDEX: bool = False
+    # Content dedup: pages identical to, or within this many SimHash bits of, an
+    # earlier page become aliases of it and are not expanded
+    CRAWL_CONTENT_DEDUP: bool = True
+    CRAWL_NEAR_DUP_MAX_DISTANCE: int = 3
+    # Processes extracting links from crawled pages (0 parses on the event loop)
+    CRAWL_PARSE_WORKERS: int = 2
+
+    # On-disk fetch cache for crawls (pages younger than FRESHNESS seconds skip the network).
+    # Past MAX_ENTRIES pages or MAX_BYTES of compressed bodies the oldest are evicted (0 = no limit)
+    CRAWL_CACHE_ENABLED: bool = True
+    CRAWL_CACHE_PATH: str = "crawl_cache.db"
+    CRAWL_CACHE_FRESHNESS: float = 600.0
+    CRAWL_CACHE_MAX_ENTRIES: int = 100_000
+    CRAWL_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # Resumable crawl jobs: SQLite file with their frontier and graph, URLs claimed per
+    # batch, seconds a claim is held before another process may take it over, and
+    # seconds between checkpoints of fetched pages
+    CRAWL_JOBS_PATH: str = "crawl_jobs.db"
+    CRAWL_JOB_CLAIM_BATCH: int = 256
+    CRAWL_JOB_LEASE: float = 300.0
+    CRAWL_JOB_CHECKPOINT_INTERVAL: float = 5.0
+
+    # Background jobs: running at once overall and per client, unfinished jobs one
+    # client may have, and seconds a finished job's result is kept
+    JOBS_MAX_RUNNING: int = 4
+    JOBS_MAX_RUNNING_PER_CLIENT: int = 2
+    JOBS_MAX_PENDING_PER_CLIENT: int = 10
+    JOBS_RESULT_TTL: float = 900.0
+    # Tell clients apart by the X-Client-Id header instead of their address; only
+    # enable behind a proxy or auth layer that sets it
+    JOBS_TRUST_CLIENT_ID_HEADER: bool = False
+
+    # PageRank power iteration (stops early once the L1 change drops below the tolerance)
+    PAGERANK_DAMPING: float = 0.85
+    PAGERANK_TOLERANCE: float = 1e-6
+    PAGERANK_MAX_ITERATIONS: int = 100
+    # Recent crawl graphs kept in memory for personalized / warm-started reranking
+    GRAPH_STORE_MAX_GRAPHS: int = 16
+
+    # HTML parser engine: "auto" (selectolax > lxml > bs4, whichever is installed), or one of them
+    HTML_PARSER: str = "auto"
+
+    # Batch scraping
+    SCRAPE_BATCH_MAX_JOBS: int = 200
+    SCRAPE_BATCH_CONCURRENCY: int = 10
+    SCRAPE_PARSE_WORKERS: int = 2
+
     model_config = SettingsConfigDict(
         env_file=".env",
         extra="ignore"
     )
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -49,6 +49,8 @@ class ScrapedElement(Base):
     page_id = Column(UUID(as_uuid=True), ForeignKey("scraped_pages.id", ondelete="CASCADE"), nullable=False)
     tag_name = Column(String)
     text_content = Column(Text)
+    selector_name = Column(String, nullable=True)
+    row_index = Column(Integer, nullable=True)
     detected_type = Column(String, nullable=True)
     numeric_value = Column(Float, nullable=True)
     date_value = Column(DateTime, nullable=True)
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .db.session import engine
 from .db.models import Base
@@ -5,10 +6,38 @@ from .core.config import settings
 from .routes.sessions import router as sessions_router
 from .routes.pages import router as pages_router
 from .routes.graph import router as graph_router
+from .routes.jobs import router as jobs_router
 from fastapi.middleware.cors import CORSMiddleware
 from .routes.preview import router as preview_router
+from .services.browser import init_driver_pool, close_driver_pool
+from .services.render_queue import get_render_queue, close_render_queue
+from .services.http_client import init_http_clients, close_http_clients
+from .services.scraper import close_parse_pool
+from .services.fetch_cache import close_fetch_cache
+from .services.crawl_parse import close_crawl_parse_pool
+from .services.crawl_frontier import close_crawl_frontier
+from .services.job_manager import close_job_manager
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_http_clients()
+    init_driver_pool()
+    get_render_queue()
+    try:
+        yield
+    finally:
+        await close_job_manager()
+        close_render_queue()
+        close_driver_pool()
+        close_parse_pool()
+        close_crawl_parse_pool()
+        close_fetch_cache()
+        close_crawl_frontier()
+        await close_http_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",  # Vite default
@@ -26,4 +55,5 @@ app.add_middleware(
 app.include_router(sessions_router)
 app.include_router(pages_router)
 app.include_router(graph_router)
+app.include_router(jobs_router)
 app.include_router(preview_router)
\ No newline at end of file
@@ -1,20 +1,160 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.graph import GraphRequest, GraphResponse
-from app.services.link_graph import build_graph_response
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.schemas.graph import (
+    CrawlJobResponse,
+    GraphRequest,
+    GraphResponse,
+    RerankRequest,
+    RerankResponse,
+)
+from app.schemas.job import JobResponse
+from app.routes.jobs import submit_job
+from app.services.crawl_frontier import get_crawl_frontier
+from app.services.graph_store import get_graph_store
+from app.services.link_graph import (
+    CrawlStats,
+    build_crawl_job_response,
+    build_graph_response,
+    create_crawl_job,
+    personalized_ranks,
+    stream_graph,
+)
 
 router = APIRouter(prefix="/graph", tags=["graph"])
 
-@router.post("/pagerank", response_model=GraphResponse)
-async def graph_pagerank(req: GraphRequest):
+def _validate(req: GraphRequest) -> None:
     if req.max_hops < 1 or req.max_hops > 3:
         raise HTTPException(status_code=400, detail="max_hops must be between 1 and 3")
-    if req.max_pages < 10 or req.max_pages > 2000:
-        raise HTTPException(status_code=400, detail="max_pages must be between 10 and 2000")
+    if req.max_pages < 10 or req.max_pages > settings.CRAWL_MAX_PAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max_pages must be between 10 and {settings.CRAWL_MAX_PAGES}",
+        )
+
+@router.post("/pagerank", response_model=GraphResponse)
+async def graph_pagerank(req: GraphRequest):
+    _validate(req)
 
-    seed, nodes, edges = await build_graph_response(
+    return _graph_result(*await build_graph_response(
         seed_url=str(req.url),
         max_hops=req.max_hops,
         max_pages=req.max_pages,
         same_domain_only=req.same_domain_only,
+    ))
+
+def _crawl_progress(stats: CrawlStats) -> dict:
+    return {
+        "done": stats.pages_fetched + stats.cache_hits,
+        "remaining": stats.queued,
+        "errors": stats.fetch_errors + stats.worker_errors,
+        **stats.as_dict(),
+    }
+
+def _graph_result(seed: str, nodes: list, edges: list, stats: dict) -> dict:
+    return {
+        "seed": seed,
+        "graph_id": stats.pop("graph_id"),
+        "nodes": nodes,
+        "edges": edges,
+        "stats": stats,
+    }
+
+@router.post("/pagerank/jobs", response_model=JobResponse, status_code=202)
+async def graph_pagerank_job(req: GraphRequest, request: Request):
+    # Same as POST /pagerank, run in the background; fetch the result from /jobs/{job_id}/result.
+    _validate(req)
+
+    async def run(job):
+        stats = CrawlStats()
+        job.progress = lambda: _crawl_progress(stats)
+        return _graph_result(*await build_graph_response(
+            seed_url=str(req.url),
+            max_hops=req.max_hops,
+            max_pages=req.max_pages,
+            same_domain_only=req.same_domain_only,
+            stats=stats,
+        ))
+
+    return submit_job(request, "graph", run)
+
+@router.post("/pagerank/stream")
+async def graph_pagerank_stream(req: GraphRequest, format: str = "ndjson"):
+    _validate(req)
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    async def frames():
+        async for event in stream_graph(
+            seed_url=str(req.url),
+            max_hops=req.max_hops,
+            max_pages=req.max_pages,
+            same_domain_only=req.same_domain_only,
+        ):
+            data = json.dumps(event, separators=(",", ":"))
+            if format == "sse":
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+            else:
+                yield data + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        frames(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return {"seed": seed, "nodes": nodes, "edges": edges}
\ No newline at end of file
+
+@router.post("/crawls", response_model=CrawlJobResponse)
+def create_crawl(req: GraphRequest):
+    _validate(req)
+    job = create_crawl_job(str(req.url), req.max_hops, req.max_pages, req.same_domain_only)
+    return vars(job)
+
+@router.get("/crawls/{crawl_id}", response_model=CrawlJobResponse)
+def get_crawl(crawl_id: str):
+    job = get_crawl_frontier().get(crawl_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+    return vars(job)
+
+@router.post("/crawls/{crawl_id}/run", response_model=GraphResponse)
+async def run_crawl(crawl_id: str):
+    # Starts, resumes or joins the crawl (any number of processes may run it at
+    # once) and returns the graph when its frontier is empty.
+    try:
+        return _graph_result(*await build_crawl_job_response(crawl_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+
+@router.post("/crawls/{crawl_id}/jobs", response_model=JobResponse, status_code=202)
+async def run_crawl_in_background(crawl_id: str, request: Request):
+    if await run_in_threadpool(get_crawl_frontier().get, crawl_id) is None:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+
+    async def run(job):
+        stats = CrawlStats()
+        job.progress = lambda: _crawl_progress(stats)
+        return _graph_result(*await build_crawl_job_response(crawl_id, stats=stats))
+
+    return submit_job(request, "crawl", run)
+
+@router.post("/{graph_id}/pagerank", response_model=RerankResponse)
+def graph_rerank(graph_id: str, req: RerankRequest):
+    graph = get_graph_store().get(graph_id)
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Graph not found (it may have been evicted)")
+
+    try:
+        ranks, info = personalized_ranks(graph, req.teleport, warm_start=req.warm_start)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Not a node of this graph: {e.args[0]}")
+
+    return {
+        "graph_id": graph.graph_id,
+        "seed": graph.seed,
+        "teleport": req.teleport,
+        "ranks": ranks,
+        "stats": info,
+    }
@@ -0,0 +1,53 @@
+from typing import Any, Awaitable, Callable, List
+from fastapi import APIRouter, HTTPException, Request
+from app.core.config import settings
+from app.schemas.job import JobResponse
+from app.services.job_manager import DONE, FAILED, Job, JobLimitExceeded, get_job_manager
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def client_id(request: Request) -> str:
+    # Limits are per client address. X-Client-Id is only honoured when a proxy or auth
+    # layer in front of the server sets it, since any caller could send a fresh one.
+    if settings.JOBS_TRUST_CLIENT_ID_HEADER and request.headers.get("x-client-id"):
+        return request.headers["x-client-id"]
+    return request.client.host if request.client else "unknown"
+
+def submit_job(request: Request, kind: str, run: Callable[[Job], Awaitable[Any]]) -> dict:
+    try:
+        job = get_job_manager().submit(kind, client_id(request), run)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.info()
+
+def _get_job(job_id: str) -> Job:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (finished jobs expire)")
+    return job
+
+@router.get("", response_model=List[JobResponse])
+async def list_jobs(request: Request):
+    return [job.info() for job in get_job_manager().for_client(client_id(request))]
+
+@router.get("/stats")
+async def job_stats():
+    return get_job_manager().stats()
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    return _get_job(job_id).info()
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"Job failed: {job.error}")
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    _get_job(job_id)
+    return get_job_manager().cancel(job_id).info()
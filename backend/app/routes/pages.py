@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import SessionLocal, get_db
 from app.db.models import ScrapeSession, ScrapedPage, ScrapedElement
-from app.schemas.page import PageCreate, PageResponse, ScrapedElementResponse
-from app.services.scraper import scrape_static
-import requests
+from app.schemas.page import (
+    PageBatchCreate,
+    PageBatchItemResult,
+    PageBatchResponse,
+    PageCreate,
+    PageResponse,
+    ScrapedElementResponse,
+)
+from app.schemas.job import JobResponse
+from app.routes.jobs import submit_job
+from app.services.records import group_records
+from app.services.scraper import ScrapeJob, ScrapeResult, scrape_batch, scrape_page
 from uuid import UUID
+import json
 
 router = APIRouter(tags=["pages"])
 
@@ -24,16 +36,175 @@ def create_page_and_scrape(
         raise HTTPException(status_code=404, detail="Session not found")
 
     try:
-        raw_results = scrape_static(payload.url, payload.selector)
-        raw_html = requests.get(payload.url).text
+        result = scrape_page(
+            payload.url,
+            payload.selector,
+            payload.mode,
+            fields=payload.selectors,
+            container=payload.container,
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Scraping failed: {str(e)}")
 
+    page, elements_response = _add_scraped_page(
+        db,
+        session_id=session_id,
+        payload=payload,
+        result=result,
+    )
+
+    db.commit()
+
+    return _page_response(page, elements_response, result.records)
+
+
+@router.post("/sessions/{session_id}/pages/batch", response_model=PageBatchResponse)
+async def create_pages_batch(
+    session_id: UUID,
+    payload: PageBatchCreate,
+    db: Session = Depends(get_db),
+):
+    jobs, concurrency = await _prepare_batch(db, session_id, payload)
+    outcomes = await scrape_batch(jobs, concurrency=concurrency)
+
+    return await run_in_threadpool(_persist_batch, db, session_id, payload, outcomes)
+
+
+@router.post("/sessions/{session_id}/pages/batch/jobs", response_model=JobResponse, status_code=202)
+async def submit_pages_batch(
+    session_id: UUID,
+    payload: PageBatchCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    # Same as /pages/batch, run in the background; the result is the PageBatchResponse.
+    jobs, concurrency = await _prepare_batch(db, session_id, payload)
+
+    async def run(job):
+        finished = {"done": 0, "errors": 0}
+
+        def on_done(outcome):
+            finished["done"] += 1
+            if isinstance(outcome, Exception):
+                finished["errors"] += 1
+
+        job.progress = lambda: {**finished, "remaining": len(jobs) - finished["done"]}
+        outcomes = await scrape_batch(jobs, concurrency=concurrency, on_done=on_done)
+        return await run_in_threadpool(_persist_batch_in_new_session, session_id, payload, outcomes)
+
+    return submit_job(request, "scrape_batch", run)
+
+
+async def _prepare_batch(
+    db: Session,
+    session_id: UUID,
+    payload: PageBatchCreate,
+) -> tuple[list[ScrapeJob], int]:
+    if len(payload.jobs) > settings.SCRAPE_BATCH_MAX_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.SCRAPE_BATCH_MAX_JOBS} jobs",
+        )
+
+    session = await run_in_threadpool(
+        lambda: db.query(ScrapeSession).filter(ScrapeSession.id == session_id).first()
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    concurrency = min(
+        payload.concurrency or settings.SCRAPE_BATCH_CONCURRENCY,
+        settings.SCRAPE_BATCH_CONCURRENCY,
+    )
+    jobs = [
+        ScrapeJob(
+            url=job.url,
+            selector=job.selector,
+            mode=job.mode,
+            fields=job.selectors,
+            container=job.container,
+        )
+        for job in payload.jobs
+    ]
+    return jobs, concurrency
+
+
+def _persist_batch_in_new_session(
+    session_id: UUID,
+    payload: PageBatchCreate,
+    outcomes: list,
+) -> PageBatchResponse:
+    # Background jobs outlive the request, and with it the request's DB session.
+    db = SessionLocal()
+    try:
+        return _persist_batch(db, session_id, payload, outcomes)
+    finally:
+        db.close()
+
+
+def _persist_batch(
+    db: Session,
+    session_id: UUID,
+    payload: PageBatchCreate,
+    outcomes: list,
+) -> PageBatchResponse:
+    # Every successful job is written in a single transaction. Responses are built
+    # before the commit so the pages are not reloaded one by one afterwards.
+    results = []
+    for job, outcome in zip(payload.jobs, outcomes):
+        if not isinstance(outcome, ScrapeResult):
+            results.append(PageBatchItemResult(
+                url=job.url,
+                page_name=job.page_name,
+                ok=False,
+                error=f"Scraping failed: {str(outcome)}",
+            ))
+            continue
+
+        page, elements_response = _add_scraped_page(
+            db,
+            session_id=session_id,
+            payload=job,
+            result=outcome,
+        )
+        results.append(PageBatchItemResult(
+            url=job.url,
+            page_name=job.page_name,
+            ok=True,
+            page=_page_response(page, elements_response, outcome.records),
+        ))
+
+    db.commit()
+
+    succeeded = sum(1 for r in results if r.ok)
+    return PageBatchResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results,
+    )
+
+
+def _stored_selector(payload: PageCreate) -> str:
+    # Named selector maps are kept as JSON so the page still records what produced it.
+    if payload.selectors:
+        return json.dumps(
+            {"container": payload.container, "selectors": payload.selectors}
+            if payload.container else payload.selectors
+        )
+    return payload.selector
+
+
+def _add_scraped_page(
+    db: Session,
+    session_id: UUID,
+    payload: PageCreate,
+    result: ScrapeResult,
+) -> tuple[ScrapedPage, list[ScrapedElementResponse]]:
     page = ScrapedPage(
         session_id=session_id,
         url=payload.url,
-        selector=payload.selector,
-        raw_html=raw_html,
+        selector=_stored_selector(payload),
+        raw_html=result.body,
         mode=payload.mode or "static",
         page_name=payload.page_name,
     )
@@ -43,11 +214,13 @@ def create_page_and_scrape(
 
     elements_response = []
 
-    for item in raw_results:
+    for item in result.elements:
         element = ScrapedElement(
             page_id=page.id,
             tag_name=item["tag_name"],
             text_content=item["text_content"],
+            selector_name=item["selector_name"],
+            row_index=item["row_index"],
             detected_type=item["detected_type"],
             numeric_value=item["numeric_value"],
             date_value=item["date_value"],
@@ -59,14 +232,22 @@ def create_page_and_scrape(
             ScrapedElementResponse(
                 tag_name=item["tag_name"],
                 text_content=item["text_content"],
+                selector_name=item["selector_name"],
+                row_index=item["row_index"],
                 detected_type=item["detected_type"],
                 numeric_value=item["numeric_value"],
                 date_value=item["date_value"],
             )
         )
 
-    db.commit()
+    return page, elements_response
+
 
+def _page_response(
+    page: ScrapedPage,
+    elements_response: list[ScrapedElementResponse],
+    records: list[dict],
+) -> PageResponse:
     return PageResponse(
         id=page.id,
         url=page.url,
@@ -76,7 +257,16 @@ def create_page_and_scrape(
         raw_html=page.raw_html,
         created_at=page.created_at,
         elements=elements_response,
+        records=records,
+    )
+
+
+def _stored_page_response(page: ScrapedPage) -> PageResponse:
+    # Records are rebuilt from the stored elements' selector names and row indexes.
+    records = group_records(
+        (el.selector_name, el.row_index, el.text_content) for el in page.elements
     )
+    return PageResponse.model_validate(page, from_attributes=True).model_copy(update={"records": records})
 
 
 @router.get("/sessions/{session_id}/pages", response_model=list[PageResponse])
@@ -87,7 +277,7 @@ def get_pages_for_session(session_id: UUID, db: Session = Depends(get_db)):
         ScrapedPage.created_at.desc()
     ).all()
 
-    return pages
+    return [_stored_page_response(page) for page in pages]
 
 
 @router.get("/pages/{page_id}", response_model=PageResponse)
@@ -99,7 +289,7 @@ def get_page(page_id: UUID, db: Session = Depends(get_db)):
     if not page:
         raise HTTPException(status_code=404, detail="Page not found")
 
-    return page
+    return _stored_page_response(page)
 
 
 @router.delete("/pages/{page_id}")
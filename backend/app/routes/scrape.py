@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.db.models import ScrapedPage, ScrapedElement, ScrapeSession
 from app.schemas.scrape import ScrapeRequest, ScrapeResponse, ScrapedElementResponse
-from app.services.scraper import scrape_static
+from app.services.scraper import scrape_page
 
 router = APIRouter(prefix="/scrape", tags=["scrape"])
 
@@ -15,17 +15,14 @@ def scrape(request: ScrapeRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Session not found")
 
     try:
-        raw_results = scrape_static(request.url, request.selector)
+        result = scrape_page(request.url, request.selector, request.mode)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Scraping failed: {str(e)}")
 
-    import requests as req
-    raw_html = req.get(request.url).text
-
     page = ScrapedPage(
         session_id=request.session_id,
         url=request.url,
-        raw_html=raw_html,
+        raw_html=result.body,
         selector=request.selector,
         mode=request.mode or "static",
     )
@@ -33,7 +30,7 @@ def scrape(request: ScrapeRequest, db: Session = Depends(get_db)):
     db.flush()
 
     elements = []
-    for item in raw_results:
+    for item in result.elements:
         el = ScrapedElement(
             page_id=page.id,
             tag_name=item["tag_name"],
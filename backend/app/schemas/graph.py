@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class GraphRequest(BaseModel):
     url: HttpUrl
@@ -13,6 +13,8 @@ class GraphNode(BaseModel):
     domain: str
     depth: int
     pagerank: float
+    # Other URLs that served the same (or nearly the same) content
+    aliases: List[str] = []
 
 class GraphEdge(BaseModel):
     source: str
@@ -20,5 +22,35 @@ class GraphEdge(BaseModel):
 
 class GraphResponse(BaseModel):
     seed: str
+    graph_id: Optional[str] = None
     nodes: List[GraphNode]
-    edges: List[GraphEdge]
\ No newline at end of file
+    edges: List[GraphEdge]
+    stats: Optional[Dict[str, Any]] = None
+
+class RerankRequest(BaseModel):
+    # URLs or node ids random jumps go to; empty means plain PageRank
+    teleport: List[str] = []
+    warm_start: bool = True
+
+class RerankResponse(BaseModel):
+    graph_id: str
+    seed: str
+    teleport: List[str]
+    ranks: Dict[str, float]
+    stats: Dict[str, Any]
+
+class CrawlJobResponse(BaseModel):
+    crawl_id: str
+    seed: str
+    max_hops: int
+    max_pages: int
+    same_domain_only: bool
+    # "pending", "running", "interrupted" or "done"
+    status: str
+    created_at: float
+    updated_at: float
+    discovered: int
+    done: int
+    queued: int
+    claimed: int
+    edges: int
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+class JobResponse(BaseModel):
+    job_id: str
+    # "graph", "crawl" or "scrape_batch"
+    kind: str
+    # "queued", "running", "done", "failed" or "cancelled"
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = {}
+    # Rough estimate from the rate so far and the work still known to be left
+    eta_seconds: Optional[float] = None
+    error: Optional[str] = None
@@ -1,20 +1,30 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
 class PageCreate(BaseModel):
     url: str
-    selector: str
+    selector: Optional[str] = None
+    selectors: Optional[Dict[str, str]] = None
+    container: Optional[str] = None
     mode: Optional[str] = "static"
     page_name: str = Field(alias="pageName")
 
     model_config = ConfigDict(populate_by_name=True)
 
+    @model_validator(mode="after")
+    def _require_selector(self):
+        if not self.selector and not self.selectors:
+            raise ValueError("Either selector or selectors must be provided")
+        return self
+
 
 class ScrapedElementResponse(BaseModel):
     tag_name: Optional[str] = None
     text_content: str
+    selector_name: Optional[str] = None
+    row_index: Optional[int] = None
     detected_type: Optional[str] = None
     numeric_value: Optional[float] = None
     date_value: Optional[datetime] = None
@@ -29,9 +39,32 @@ class PageResponse(BaseModel):
     raw_html: str
     created_at: datetime
     elements: List[ScrapedElementResponse]
+    records: List[Dict[str, Optional[str]]] = []
 
     class Config:
         from_attributes = True
 
+class PageBatchItem(PageCreate):
+    pass
+
+
+class PageBatchCreate(BaseModel):
+    jobs: List[PageBatchItem]
+    concurrency: Optional[int] = None
+
+
+class PageBatchItemResult(BaseModel):
+    url: str
+    page_name: str
+    ok: bool
+    error: Optional[str] = None
+    page: Optional[PageResponse] = None
+
+
+class PageBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[PageBatchItemResult]
+
 PageResponse.model_rebuild()
 ScrapedElementResponse.model_rebuild()
\ No newline at end of file
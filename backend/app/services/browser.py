@@ -1,16 +1,87 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urlparse
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
 _USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/131.0.0.0 Safari/537.36"
 )
+# Resource timing entries kept per page (default 250) for the networkidle wait
+_RESOURCE_TIMING_BUFFER = 10_000
+
+# Patterns understood by CDP Network.setBlockedURLs ("*" is a wildcard).
+RESOURCE_TYPE_PATTERNS: dict[str, tuple[str, ...]] = {
+    "image": ("*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*", "*.bmp*"),
+    "font": ("*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"),
+    "media": ("*.mp4*", "*.webm*", "*.mp3*", "*.ogg*", "*.wav*", "*.m4a*", "*.mov*", "*.m3u8*"),
+    "stylesheet": ("*.css*",),
+    "tracking": (
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*googlesyndication.com*",
+        "*connect.facebook.net*",
+        "*hotjar.com*",
+        "*segment.io*",
+        "*cdn.segment.com*",
+    ),
+}
+
+WAIT_STRATEGIES = ("domcontentloaded", "load", "networkidle", "selector")
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    blocked_resource_types: tuple[str, ...] = ()
+    blocked_url_patterns: tuple[str, ...] = ()
+    wait: str = "domcontentloaded"
+    wait_selector: str | None = None
+    network_idle_ms: int = 500
+
+    def __post_init__(self):
+        if self.wait not in WAIT_STRATEGIES:
+            raise ValueError(f"Unknown wait strategy: {self.wait}")
+        if self.wait == "selector" and not self.wait_selector:
+            raise ValueError("wait_selector is required for the 'selector' wait strategy")
+        unknown = set(self.blocked_resource_types) - RESOURCE_TYPE_PATTERNS.keys()
+        if unknown:
+            raise ValueError(f"Unknown resource types: {', '.join(sorted(unknown))}")
+
+    def blocked_urls(self) -> list[str]:
+        urls: list[str] = []
+        for rtype in self.blocked_resource_types:
+            urls.extend(RESOURCE_TYPE_PATTERNS[rtype])
+        urls.extend(self.blocked_url_patterns)
+        return urls
+
+
+@lru_cache(maxsize=1)
+def _driver_path() -> str:
+    # ChromeDriverManager hits the network and the filesystem; resolve it once per process.
+    return ChromeDriverManager().install()
 
-def create_driver(): 
+def create_driver(profile: RenderProfile | None = None):
     options = Options()
+    # Return from driver.get() at DOMContentLoaded; wait_for_render() decides how much longer to wait.
+    options.page_load_strategy = "eager"
     options.add_argument("--headless=new")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-gpu")
@@ -26,7 +97,7 @@ def create_driver():
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option("useAutomationExtension", False)
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    driver = webdriver.Chrome(service=Service(_driver_path()), options=options)
 
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
         "source": """
@@ -36,5 +107,213 @@ def create_driver():
             window.chrome = { runtime: {} };
         """
     })
+    # Lets _wait_network_idle see every finished request, not just the first 250.
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": f"performance.setResourceTimingBufferSize({_RESOURCE_TIMING_BUFFER});"
+    })
+
+    if profile is not None:
+        apply_render_profile(driver, profile)
+
+    return driver
+
+
+def apply_render_profile(driver, profile: RenderProfile) -> None:
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile.blocked_urls()})
+
+
+def _wait_network_idle(driver, timeout: float, idle_ms: int) -> None:
+    # Resource timing entries only appear once a request finishes, so "idle" here means
+    # the document has loaded and no further request completed for `idle_ms`. The
+    # entry buffer is enlarged in create_driver (browsers stop recording at 250).
+    state = {"count": -1, "since": time.monotonic()}
+
+    def idle(d) -> bool:
+        count = d.execute_script(
+            "return document.readyState === 'complete'"
+            " ? performance.getEntriesByType('resource').length : -1"
+        )
+        now = time.monotonic()
+        if count != state["count"]:
+            state["count"], state["since"] = count, now
+            return False
+        return count >= 0 and (now - state["since"]) * 1000 >= idle_ms
+
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(idle)
+
+
+def wait_for_render(driver, profile: RenderProfile, timeout: float) -> None:
+    if profile.wait == "domcontentloaded":
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") != "loading"
+        )
+    elif profile.wait == "load":
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    elif profile.wait == "networkidle":
+        _wait_network_idle(driver, timeout, profile.network_idle_ms)
+    elif profile.wait == "selector":
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, profile.wait_selector))
+        )
+
+
+class BrowserPoolTimeout(Exception):
+    pass
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+# Bounded pool of warm headless drivers. A driver is recycled after `max_pages`
+# checkouts or once it stops responding; cookies/storage are wiped on checkin.
+class DriverPool:
+    def __init__(self, size: int, max_pages: int, checkout_timeout: float):
+        self._size = max(1, size)
+        self._max_pages = max(1, max_pages)
+        self._checkout_timeout = checkout_timeout
+        self._idle: queue.LifoQueue[_PooledDriver] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._total = 0
+        self._closed = False
+
+    def warm(self) -> None:
+        with self._lock:
+            missing = self._size - self._total
+            self._total += missing
+        for _ in range(missing):
+            try:
+                self._idle.put(_PooledDriver(create_driver()))
+            except Exception:
+                with self._lock:
+                    self._total -= 1
+                logger.exception("Failed to pre-warm browser driver")
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None):
+        # Waits at most `timeout` seconds (when shorter than the pool's own checkout
+        # timeout) for a browser, e.g. whatever is left of a render deadline.
+        if timeout is None:
+            timeout = self._checkout_timeout
+        entry = self._acquire(min(timeout, self._checkout_timeout))
+        try:
+            yield entry.driver
+        finally:
+            self._release(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(entry)
+
+    def _acquire(self, timeout: float) -> _PooledDriver:
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                entry = self._try_create()
+                if entry is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise BrowserPoolTimeout("No browser available")
+                    try:
+                        entry = self._idle.get(timeout=remaining)
+                    except queue.Empty:
+                        raise BrowserPoolTimeout("No browser available")
+
+            if self._is_alive(entry):
+                return entry
+            self._discard(entry)
+
+    def _try_create(self) -> _PooledDriver | None:
+        with self._lock:
+            if self._total >= self._size:
+                return None
+            self._total += 1
+        try:
+            return _PooledDriver(create_driver())
+        except Exception:
+            with self._lock:
+                self._total -= 1
+            raise
+
+    def _release(self, entry: _PooledDriver) -> None:
+        entry.pages += 1
+        if self._closed or entry.pages >= self._max_pages or not self._reset(entry):
+            self._discard(entry)
+            return
+        self._idle.put(entry)
+
+    def _discard(self, entry: _PooledDriver) -> None:
+        with self._lock:
+            self._total -= 1
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_alive(entry: _PooledDriver) -> bool:
+        try:
+            entry.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(entry: _PooledDriver) -> bool:
+        driver = entry.driver
+        try:
+            parsed = urlparse(driver.current_url)
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            if parsed.scheme in ("http", "https"):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                    "origin": f"{parsed.scheme}://{parsed.netloc}",
+                    "storageTypes": "all",
+                })
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+
+_pool: DriverPool | None = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool() -> DriverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                size=settings.BROWSER_POOL_SIZE,
+                max_pages=settings.BROWSER_MAX_PAGES_PER_DRIVER,
+                checkout_timeout=settings.BROWSER_CHECKOUT_TIMEOUT,
+            )
+        return _pool
+
+def init_driver_pool() -> DriverPool:
+    pool = get_driver_pool()
+    if settings.BROWSER_WARM_ON_STARTUP:
+        pool.warm()
+    return pool
 
-    return driver
\ No newline at end of file
+def close_driver_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+# Thread-safe LRU cache bounded by entry count and total bytes, with a per-entry
+# TTL. Concurrent misses for the same key share a single computation.
+class RenderCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, int, str]] = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            cached = self._get_locked(key)
+            if cached is not None:
+                self._hits += 1
+            return cached
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], str]) -> str:
+        with self._lock:
+            cached = self._get_locked(key)
+            if cached is not None:
+                self._hits += 1
+                return cached
+
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                self._misses += 1
+                pending = Future()
+                self._inflight[key] = pending
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return pending.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._put_locked(key, value)
+        pending.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_ratio": (self._hits + self._coalesced) / lookups if lookups else 0.0,
+            }
+
+    def _get_locked(self, key: Hashable) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._bytes -= size
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_locked(self, key: Hashable, value: str) -> None:
+        if self._ttl <= 0 or self._max_entries <= 0:
+            return
+        size = len(value.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+
+        self._entries[key] = (time.monotonic() + self._ttl, size, value)
+        self._bytes += size
+
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
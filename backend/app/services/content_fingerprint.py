@@ -0,0 +1,77 @@
+import hashlib
+import heapq
+import re
+import zlib
+
+_SCRIPT_STYLE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]*>")
+_WORD = re.compile(r"\w+")
+
+SHINGLE_WORDS = 3
+MAX_FEATURES = 4096
+# Pages with fewer words than this only take part in exact-duplicate detection.
+MIN_WORDS = 50
+
+
+def content_digest(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def page_simhash(html: str) -> int | None:
+    # 64-bit SimHash over word 3-shingles of the page's visible text. Large pages
+    # use a bottom-k sample of their shingles (smallest CRC32 first), which keeps
+    # the cost bounded and still tracks Jaccard similarity.
+    words = _WORD.findall(_TAG.sub(" ", _SCRIPT_STYLE.sub(" ", html)).lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    shingles = {
+        " ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8")
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+    if len(shingles) > MAX_FEATURES:
+        shingles = heapq.nsmallest(MAX_FEATURES, shingles, key=zlib.crc32)
+
+    counts = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "little")
+        for bit in range(64):
+            if h >> bit & 1:
+                counts[bit] += 1
+    half = len(shingles) / 2
+    return sum(1 << bit for bit, c in enumerate(counts) if c > half)
+
+
+# Maps page content to the first node that served it: exact duplicates by body
+# digest, near duplicates by SimHash within `max_distance` bits. The 64 bits are
+# split into max_distance + 1 bands; two hashes that close must agree on a band.
+class ContentIndex:
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max(0, min(max_distance, 15))
+        n_bands = self.max_distance + 1
+        width = 64 // n_bands
+        self._bands = [
+            (i * width, (64 - i * width) if i == n_bands - 1 else width) for i in range(n_bands)
+        ]
+        self._exact: dict[bytes, int] = {}
+        self._near: dict[tuple[int, int], list[tuple[int, int]]] = {}
+
+    def exact(self, digest: bytes, node: int) -> int | None:
+        # Registers `node` for `digest` unless another node already has it.
+        original = self._exact.setdefault(digest, node)
+        return original if original != node else None
+
+    def near(self, simhash: int) -> int | None:
+        for key in self._keys(simhash):
+            for other, node in self._near.get(key, ()):
+                if (other ^ simhash).bit_count() <= self.max_distance:
+                    return node
+        return None
+
+    def add_near(self, simhash: int, node: int) -> None:
+        for key in self._keys(simhash):
+            self._near.setdefault(key, []).append((simhash, node))
+
+    def _keys(self, simhash: int):
+        for i, (shift, width) in enumerate(self._bands):
+            yield i, simhash >> shift & ((1 << width) - 1)
@@ -0,0 +1,331 @@
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from ..core.config import settings
+from .url_graph import CrawlGraph
+
+# Node states. PARKED nodes were found at max_hops and are only fetched if a
+# shorter path to them turns up.
+QUEUED, CLAIMED, DONE, PARKED = 0, 1, 2, 3
+
+
+@dataclass
+class CrawlJob:
+    crawl_id: str
+    seed: str
+    max_hops: int
+    max_pages: int
+    same_domain_only: bool
+    status: str
+    created_at: float
+    updated_at: float
+    discovered: int = 0
+    done: int = 0
+    queued: int = 0
+    claimed: int = 0
+    edges: int = 0
+
+
+# What one process learned about a claimed page, written back at the next checkpoint.
+@dataclass
+class PageResult:
+    node: int
+    depth: int
+    links: list[str] = field(default_factory=list)
+    digest: bytes | None = None
+    alias_of: int | None = None
+
+
+# Durable state of resumable crawls: the frontier, discovered URLs with their ids
+# and depths, edges and duplicate aliases, in one SQLite file. Processes claim
+# batches of queued URLs under a lease and write their results back in a single
+# transaction, so several of them can work on one crawl and a crashed one's
+# claims are taken over once the lease runs out. Node ids are handed out densely
+# in discovery order, as in CrawlGraph.
+class CrawlFrontier:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_jobs (
+                crawl_id TEXT PRIMARY KEY,
+                seed TEXT NOT NULL,
+                max_hops INTEGER NOT NULL,
+                max_pages INTEGER NOT NULL,
+                same_domain_only INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                next_id INTEGER NOT NULL,
+                full_at_depth INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS crawl_nodes (
+                crawl_id TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                state INTEGER NOT NULL,
+                lease_until REAL,
+                alias_of INTEGER,
+                PRIMARY KEY (crawl_id, id)
+            ) WITHOUT ROWID;
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_crawl_nodes_url ON crawl_nodes (crawl_id, url);
+            CREATE INDEX IF NOT EXISTS idx_crawl_nodes_frontier ON crawl_nodes (crawl_id, state, depth);
+            CREATE TABLE IF NOT EXISTS crawl_edges (
+                crawl_id TEXT NOT NULL,
+                source INTEGER NOT NULL,
+                target INTEGER NOT NULL,
+                PRIMARY KEY (crawl_id, source, target)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS crawl_content (
+                crawl_id TEXT NOT NULL,
+                digest BLOB NOT NULL,
+                node INTEGER NOT NULL,
+                PRIMARY KEY (crawl_id, digest)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent claims from
+        # other processes wait instead of failing halfway through.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def create(self, seed: str, max_hops: int, max_pages: int, same_domain_only: bool) -> str:
+        crawl_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO crawl_jobs VALUES (?, ?, ?, ?, ?, 'pending', 1, NULL, ?, ?)",
+                (crawl_id, seed, max_hops, max_pages, int(same_domain_only), now, now),
+            )
+            db.execute(
+                "INSERT INTO crawl_nodes (crawl_id, id, url, depth, state) VALUES (?, 0, ?, 0, ?)",
+                (crawl_id, seed, QUEUED if max_hops > 0 and max_pages > 1 else PARKED),
+            )
+        return crawl_id
+
+    def get(self, crawl_id: str) -> CrawlJob | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT seed, max_hops, max_pages, same_domain_only, status, created_at, updated_at"
+                " FROM crawl_jobs WHERE crawl_id = ?",
+                (crawl_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT state, COUNT(*) FROM crawl_nodes WHERE crawl_id = ? GROUP BY state",
+                (crawl_id,),
+            ).fetchall())
+            edges = self._conn.execute(
+                "SELECT COUNT(*) FROM crawl_edges WHERE crawl_id = ?", (crawl_id,)
+            ).fetchone()[0]
+        seed, max_hops, max_pages, same_domain_only, status, created_at, updated_at = row
+        return CrawlJob(
+            crawl_id=crawl_id,
+            seed=seed,
+            max_hops=max_hops,
+            max_pages=max_pages,
+            same_domain_only=bool(same_domain_only),
+            status=status,
+            created_at=created_at,
+            updated_at=updated_at,
+            discovered=sum(counts.values()),
+            done=counts.get(DONE, 0),
+            queued=counts.get(QUEUED, 0),
+            claimed=counts.get(CLAIMED, 0),
+            edges=edges,
+        )
+
+    def set_status(self, crawl_id: str, status: str) -> None:
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE crawl_jobs SET status = ?, updated_at = ? WHERE crawl_id = ?",
+                (status, time.time(), crawl_id),
+            )
+
+    def claim(self, crawl_id: str, limit: int, lease: float) -> list[tuple[int, str, int]]:
+        # Hands out up to `limit` (node, url, depth) entries, shallowest first,
+        # including ones whose previous claim expired.
+        now = time.time()
+        with self._transaction() as db:
+            where, args = self._claimable(db, crawl_id, now)
+            rows = db.execute(
+                f"SELECT id, url, depth FROM crawl_nodes WHERE {where} ORDER BY depth, id LIMIT ?",
+                (*args, limit),
+            ).fetchall()
+            db.executemany(
+                "UPDATE crawl_nodes SET state = ?, lease_until = ? WHERE crawl_id = ? AND id = ?",
+                [(CLAIMED, now + lease, crawl_id, node) for node, _, _ in rows],
+            )
+        return rows
+
+    def outstanding(self, crawl_id: str) -> int:
+        # URLs still to fetch, including ones claimed by a live process.
+        with self._lock:
+            where, args = self._claimable(self._conn, crawl_id, None)
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM crawl_nodes WHERE {where}", args
+            ).fetchone()[0]
+
+    def _claimable(self, db, crawl_id: str, now: float | None) -> tuple[str, tuple]:
+        # Once max_pages is reached only pages no deeper than the one that filled
+        # the graph are still fetched (see crawl_link_graph).
+        full_at_depth = db.execute(
+            "SELECT full_at_depth FROM crawl_jobs WHERE crawl_id = ?", (crawl_id,)
+        ).fetchone()[0]
+        if now is None:
+            where, args = "crawl_id = ? AND state IN (?, ?)", (crawl_id, QUEUED, CLAIMED)
+        else:
+            where = "crawl_id = ? AND (state = ? OR (state = ? AND lease_until < ?))"
+            args = (crawl_id, QUEUED, CLAIMED, now)
+        if full_at_depth is not None:
+            where += " AND depth <= ?"
+            args += (full_at_depth,)
+        return where, args
+
+    def renew(self, crawl_id: str, nodes: list[int], lease: float) -> None:
+        # Extends the lease on claims this process is still working on.
+        until = time.time() + lease
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE crawl_nodes SET lease_until = ? WHERE crawl_id = ? AND id = ? AND state = ?",
+                [(until, crawl_id, node, CLAIMED) for node in nodes],
+            )
+
+    def release(self, crawl_id: str, nodes: list[int]) -> None:
+        # Gives back claims a stopping process did not get to.
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE crawl_nodes SET state = ?, lease_until = NULL"
+                " WHERE crawl_id = ? AND id = ? AND state = ?",
+                [(QUEUED, crawl_id, node, CLAIMED) for node in nodes],
+            )
+
+    def complete(self, crawl_id: str, results: list[PageResult]) -> None:
+        # Checkpoint: marks the pages done and merges their links into the frontier.
+        # A page whose digest another page already registered becomes its alias.
+        with self._transaction() as db:
+            max_hops, max_pages, next_id, full_at_depth = db.execute(
+                "SELECT max_hops, max_pages, next_id, full_at_depth FROM crawl_jobs WHERE crawl_id = ?",
+                (crawl_id,),
+            ).fetchone()
+
+            for r in results:
+                alias_of = r.alias_of
+                if alias_of is None and r.digest is not None:
+                    db.execute(
+                        "INSERT OR IGNORE INTO crawl_content VALUES (?, ?, ?)", (crawl_id, r.digest, r.node)
+                    )
+                    owner = db.execute(
+                        "SELECT node FROM crawl_content WHERE crawl_id = ? AND digest = ?",
+                        (crawl_id, r.digest),
+                    ).fetchone()[0]
+                    if owner != r.node:
+                        alias_of = owner
+                db.execute(
+                    "UPDATE crawl_nodes SET state = ?, lease_until = NULL, alias_of = ?"
+                    " WHERE crawl_id = ? AND id = ?",
+                    (DONE, alias_of, crawl_id, r.node),
+                )
+                if alias_of is not None or (full_at_depth is not None and r.depth > full_at_depth):
+                    # Pages claimed before the crawl filled up are not expanded.
+                    continue
+
+                depth = r.depth + 1
+                state = QUEUED if depth < max_hops else PARKED
+                for url in r.links:
+                    row = db.execute(
+                        "SELECT id, depth, state FROM crawl_nodes WHERE crawl_id = ? AND url = ?",
+                        (crawl_id, url),
+                    ).fetchone()
+                    if row is None:
+                        if full_at_depth is not None:
+                            continue
+                        node, next_id = next_id, next_id + 1
+                        db.execute(
+                            "INSERT INTO crawl_nodes (crawl_id, id, url, depth, state) VALUES (?, ?, ?, ?, ?)",
+                            (crawl_id, node, url, depth, state),
+                        )
+                        if next_id >= max_pages:
+                            full_at_depth = r.depth
+                    else:
+                        node, old_depth, old_state = row
+                        if depth < old_depth:
+                            # Reached through a shorter path than the one that discovered it first.
+                            db.execute(
+                                "UPDATE crawl_nodes SET depth = ?, state = ? WHERE crawl_id = ? AND id = ?",
+                                (depth, state if old_state == PARKED else old_state, crawl_id, node),
+                            )
+                    db.execute("INSERT OR IGNORE INTO crawl_edges VALUES (?, ?, ?)", (crawl_id, r.node, node))
+
+            db.execute(
+                "UPDATE crawl_jobs SET status = 'running', next_id = ?, full_at_depth = ?, updated_at = ?"
+                " WHERE crawl_id = ?",
+                (next_id, full_at_depth, time.time(), crawl_id),
+            )
+
+    def interrupt(self, crawl_id: str, results: list[PageResult], unfinished: list[int]) -> None:
+        # A process stopping early keeps what it fetched, gives the rest of its
+        # claims back and leaves the crawl marked for resuming.
+        self.complete(crawl_id, results)
+        self.release(crawl_id, unfinished)
+        self.set_status(crawl_id, "interrupted")
+
+    def load_graph(self, crawl_id: str) -> CrawlGraph:
+        graph = CrawlGraph()
+        with self._lock:
+            nodes = self._conn.execute(
+                "SELECT id, url, depth, alias_of FROM crawl_nodes WHERE crawl_id = ? ORDER BY id",
+                (crawl_id,),
+            ).fetchall()
+            edges = self._conn.execute(
+                "SELECT source, target FROM crawl_edges WHERE crawl_id = ? ORDER BY source, target",
+                (crawl_id,),
+            ).fetchall()
+        for node, url, depth, alias_of in nodes:
+            graph.add_node(url, depth)
+            if alias_of is not None:
+                graph.alias[node] = alias_of
+        for source, target in edges:
+            graph.edges.append(source, target)
+        graph.collapse_aliases()
+        return graph
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_frontier: CrawlFrontier | None = None
+_frontier_lock = threading.Lock()
+
+def get_crawl_frontier() -> CrawlFrontier:
+    global _frontier
+    with _frontier_lock:
+        if _frontier is None:
+            _frontier = CrawlFrontier(settings.CRAWL_JOBS_PATH)
+        return _frontier
+
+def close_crawl_frontier() -> None:
+    global _frontier
+    with _frontier_lock:
+        frontier, _frontier = _frontier, None
+    if frontier is not None:
+        frontier.close()
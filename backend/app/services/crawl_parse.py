@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urldefrag
+
+from ..core.config import settings
+from .content_fingerprint import page_simhash
+from .link_extractor import extract_links_streaming
+from .url_canon import get_canonicalizer
+
+
+def norm_url(u: str) -> str:
+    u, _ = urldefrag(u)
+    return u.rstrip("/")
+
+def extract_links(base_url: str, html: str, limit: int | None = None) -> list[str]:
+    return extract_links_streaming(base_url, html, limit=limit, normalize=norm_url)
+
+def _decode(body: bytes, encoding: str | None) -> str:
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+def parse_links(
+    base_url: str,
+    body: bytes,
+    encoding: str | None,
+    limit: int | None = None,
+    simhash: bool = False,
+) -> tuple[list[tuple[str, str]], float, int | None]:
+    # Runs in a parse worker: decodes the page, extracts its links and canonicalizes
+    # them. Returns (spelling, canonical URL) pairs, the CPU seconds spent and, if
+    # asked for, the page's SimHash.
+    started = time.thread_time()
+    html = _decode(body, encoding)
+    canonical = get_canonicalizer()
+    links = [(u, canonical(u)) for u in extract_links(base_url, html, limit)]
+    fingerprint = page_simhash(html) if simhash else None
+    return links, time.thread_time() - started, fingerprint
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if settings.CRAWL_PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.CRAWL_PARSE_WORKERS)
+        return _pool
+
+async def parse_links_async(
+    base_url: str,
+    body: bytes,
+    encoding: str | None,
+    limit: int | None = None,
+    simhash: bool = False,
+) -> tuple[list[tuple[str, str]], float, int | None]:
+    pool = _get_pool()
+    if pool is None:
+        return parse_links(base_url, body, encoding, limit, simhash)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, parse_links, base_url, body, encoding, limit, simhash)
+
+def close_crawl_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,207 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# Per-host frontier. Each host has its own FIFO, a concurrency cap and a minimum
+# spacing between request starts (the larger of the configured delay, robots.txt
+# Crawl-delay and any 429/503 backoff). get() hands out work from whichever host
+# is ready, so a throttled host never occupies a worker that another host could use.
+class HostScheduler:
+    def __init__(self, per_host_concurrency: int, min_delay: float, max_backoff: float):
+        self._per_host = max(1, per_host_concurrency)
+        self._min_delay = max(0.0, min_delay)
+        self._max_backoff = max_backoff
+        self._queues: dict[str, deque] = defaultdict(deque)
+        self._active: dict[str, int] = defaultdict(int)
+        self._next_at: dict[str, float] = {}
+        self._crawl_delay: dict[str, float] = {}
+        self._backoff: dict[str, float] = {}
+        # Work that needs no network request (e.g. fetch cache lookups) skips host limits.
+        self._immediate: deque = deque()
+        self._pending = 0
+        self._wakeup = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def put(self, url: str, *payload, polite: bool = True) -> None:
+        if polite:
+            self._queues[host_of(url)].append((url, *payload))
+        else:
+            self._immediate.append((url, *payload))
+        self._pending += 1
+        self._wakeup.set()
+
+    def drop(self, predicate) -> int:
+        # Remove queued (not yet handed out) items matching predicate(item).
+        dropped = len(self._immediate)
+        self._immediate = deque(item for item in self._immediate if not predicate(item))
+        dropped -= len(self._immediate)
+        for host, q in self._queues.items():
+            keep = deque(item for item in q if not predicate(item))
+            dropped += len(q) - len(keep)
+            self._queues[host] = keep
+        self._pending -= dropped
+        if dropped:
+            self._wakeup.set()
+        return dropped
+
+    async def get(self) -> tuple | None:
+        # Returns None once nothing is queued or in flight.
+        while True:
+            if self._immediate:
+                return self._immediate.popleft()
+
+            now = time.monotonic()
+            host, wait = self._pick(now)
+            if host is not None:
+                self._active[host] += 1
+                self._next_at[host] = now + self._delay(host)
+                return self._queues[host].popleft()
+
+            if self._pending == 0:
+                self._wakeup.set()
+                return None
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, url: str, status: int | None = None, retry_after: float | None = None) -> None:
+        # Frees the host slot of a polite item once its request is over; the item
+        # itself stays pending until task_done().
+        host = host_of(url)
+        self._active[host] -= 1
+
+        if status in (429, 503):
+            backoff = self._backoff.get(host, 0.0)
+            backoff = retry_after if retry_after is not None else max(1.0, backoff * 2, self._delay(host) * 2)
+            backoff = min(backoff, self._max_backoff)
+            self._backoff[host] = backoff
+            self._next_at[host] = max(self._next_at.get(host, 0.0), time.monotonic() + backoff)
+        elif host in self._backoff:
+            # Recover gradually once the host answers normally again.
+            backoff = self._backoff[host] / 2
+            if backoff < self._min_delay:
+                del self._backoff[host]
+            else:
+                self._backoff[host] = backoff
+
+        self._wakeup.set()
+
+    def hold(self) -> None:
+        # Counts as one pending item, so get() does not report the queue finished
+        # while a producer may still add work; released with task_done().
+        self._pending += 1
+
+    def task_done(self) -> None:
+        self._pending -= 1
+        self._wakeup.set()
+
+    def set_crawl_delay(self, host: str, seconds: float | None) -> None:
+        if seconds:
+            self._crawl_delay[host] = min(float(seconds), self._max_backoff)
+
+    def _delay(self, host: str) -> float:
+        return max(self._min_delay, self._crawl_delay.get(host, 0.0), self._backoff.get(host, 0.0))
+
+    def _pick(self, now: float) -> tuple[str | None, float | None]:
+        best_host = None
+        best_at = None
+        for host, q in self._queues.items():
+            if not q or self._active[host] >= self._per_host:
+                continue
+            at = self._next_at.get(host, 0.0)
+            if best_at is None or at < best_at:
+                best_host, best_at = host, at
+
+        if best_host is None:
+            return None, None
+        if best_at <= now:
+            return best_host, None
+        return None, best_at - now
+
+
+# robots.txt is fetched once per host and shared by every worker asking about it.
+class RobotsCache:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        user_agent: str,
+        headers: dict | None = None,
+        timeout: float = 10.0,
+    ):
+        self._client = client
+        self._user_agent = user_agent
+        self._headers = headers
+        self._timeout = timeout
+        self._parsers: dict[str, asyncio.Task] = {}
+
+    async def allowed(self, url: str) -> bool:
+        parser = await self._parser(url)
+        return parser is None or parser.can_fetch(self._user_agent, url)
+
+    async def crawl_delay(self, url: str) -> float | None:
+        parser = await self._parser(url)
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(self._user_agent)
+        if delay is None:
+            rate = parser.request_rate(self._user_agent)
+            if rate is not None and rate.requests:
+                delay = rate.seconds / rate.requests
+        return float(delay) if delay is not None else None
+
+    async def _parser(self, url: str) -> RobotFileParser | None:
+        parts = urlparse(url)
+        origin = f"{parts.scheme}://{parts.netloc.lower()}"
+        task = self._parsers.get(origin)
+        if task is None:
+            task = self._parsers[origin] = asyncio.create_task(self._load(origin))
+        return await asyncio.shield(task)
+
+    async def _load(self, origin: str) -> RobotFileParser | None:
+        # Missing or unreachable robots.txt means no restrictions.
+        try:
+            resp = await self._client.get(
+                f"{origin}/robots.txt",
+                headers=self._headers,
+                timeout=self._timeout,
+            )
+        except Exception:
+            return None
+        if resp.status_code >= 400:
+            return None
+
+        parser = RobotFileParser()
+        parser.parse(resp.text.splitlines())
+        return parser
@@ -0,0 +1,194 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+from ..core.config import settings
+
+
+@dataclass
+class CachedPage:
+    url: str
+    status: int
+    body: bytes
+    encoding: str | None
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+
+# On-disk cache of crawled HTML keyed by normalized URL. Raw bodies are stored
+# zlib-compressed along with their charset and the validators needed for
+# conditional requests. Past `max_entries` pages or `max_bytes` of stored bodies
+# (0 = unbounded) the least recently fetched pages are evicted, down to 90% of
+# the limit so that eviction does not run on every write.
+class FetchCache:
+    def __init__(self, path: str, freshness: float, max_entries: int = 0, max_bytes: int = 0):
+        self.freshness = freshness
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fetch_cache (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                encoding TEXT
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(fetch_cache)")}
+        if "encoding" not in columns:
+            # Caches written before bodies were kept as bytes hold UTF-8 text.
+            self._conn.execute("ALTER TABLE fetch_cache ADD COLUMN encoding TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_cache_fetched_at ON fetch_cache (fetched_at)")
+        # Running totals, recounted whenever a limit is hit since other processes
+        # may share the file.
+        self._entries, self._bytes = self._totals()
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at < self.freshness
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, etag, last_modified, body, fetched_at, encoding"
+                " FROM fetch_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, etag, last_modified, body, fetched_at, encoding = row
+        return CachedPage(
+            url=url,
+            status=status,
+            body=zlib.decompress(body),
+            encoding=encoding,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+        )
+
+    def put(
+        self,
+        url: str,
+        status: int,
+        body: bytes,
+        encoding: str | None,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        blob = zlib.compress(body, 6)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT length(body) FROM fetch_cache WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO fetch_cache (url, status, etag, last_modified, body, fetched_at, encoding)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    body = excluded.body,
+                    fetched_at = excluded.fetched_at,
+                    encoding = excluded.encoding
+                """,
+                (url, status, etag, last_modified, blob, time.time(), encoding),
+            )
+            if old is None:
+                self._entries += 1
+            self._bytes += len(blob) - (old[0] if old is not None else 0)
+            if self._over(1.0):
+                self._evict()
+
+    def _totals(self) -> tuple[int, int]:
+        return self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length(body)), 0) FROM fetch_cache"
+        ).fetchone()
+
+    def _over(self, fraction: float) -> bool:
+        return (
+            (self.max_entries > 0 and self._entries > self.max_entries * fraction)
+            or (self.max_bytes > 0 and self._bytes > self.max_bytes * fraction)
+        )
+
+    def _evict(self) -> None:
+        # Called with the lock held.
+        self._entries, self._bytes = self._totals()
+        if not self._over(1.0):
+            return
+        doomed = []
+        rows = self._conn.execute("SELECT url, length(body) FROM fetch_cache ORDER BY fetched_at")
+        for url, size in rows:
+            if not self._over(0.9):
+                break
+            doomed.append((url,))
+            self._entries -= 1
+            self._bytes -= size
+        rows.close()
+        self._conn.execute("BEGIN")
+        self._conn.executemany("DELETE FROM fetch_cache WHERE url = ?", doomed)
+        self._conn.execute("COMMIT")
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE fetch_cache SET fetched_at = ? WHERE url = ?", (time.time(), url)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def aget(self, url: str) -> CachedPage | None:
+        return await asyncio.to_thread(self.get, url)
+
+    async def aput(
+        self,
+        url: str,
+        status: int,
+        body: bytes,
+        encoding: str | None,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        await asyncio.to_thread(self.put, url, status, body, encoding, etag, last_modified)
+
+    async def atouch(self, url: str) -> None:
+        await asyncio.to_thread(self.touch, url)
+
+
+_cache: FetchCache | None = None
+_cache_lock = threading.Lock()
+
+def get_fetch_cache() -> FetchCache | None:
+    global _cache
+    if not settings.CRAWL_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = FetchCache(
+                settings.CRAWL_CACHE_PATH,
+                settings.CRAWL_CACHE_FRESHNESS,
+                max_entries=settings.CRAWL_CACHE_MAX_ENTRIES,
+                max_bytes=settings.CRAWL_CACHE_MAX_BYTES,
+            )
+        return _cache
+
+def close_fetch_cache() -> None:
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
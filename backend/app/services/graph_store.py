@@ -0,0 +1,64 @@
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from ..core.config import settings
+from .url_graph import CrawlGraph
+
+
+# A crawl graph plus its last rank vector per teleport set (keyed by sorted URLs;
+# the empty tuple is plain PageRank) so later runs can warm-start from it.
+@dataclass
+class StoredGraph:
+    graph_id: str
+    graph: CrawlGraph
+    ranks: dict[tuple[str, ...], list[float]] = field(default_factory=dict)
+
+    @property
+    def seed(self) -> str:
+        return self.graph.seed
+
+
+# LRU of the most recent crawl graphs, also indexed by seed URL so a recrawl of
+# the same seed can start from the previous ranks.
+class GraphStore:
+    def __init__(self, max_graphs: int):
+        self._max_graphs = max(1, max_graphs)
+        self._graphs: OrderedDict[str, StoredGraph] = OrderedDict()
+        self._by_seed: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, graph: CrawlGraph) -> StoredGraph:
+        stored = StoredGraph(graph_id=uuid.uuid4().hex, graph=graph)
+        with self._lock:
+            self._graphs[stored.graph_id] = stored
+            self._by_seed[stored.seed] = stored.graph_id
+            while len(self._graphs) > self._max_graphs:
+                _, old = self._graphs.popitem(last=False)
+                if self._by_seed.get(old.seed) == old.graph_id:
+                    del self._by_seed[old.seed]
+        return stored
+
+    def get(self, graph_id: str) -> StoredGraph | None:
+        with self._lock:
+            stored = self._graphs.get(graph_id)
+            if stored is not None:
+                self._graphs.move_to_end(graph_id)
+            return stored
+
+    def latest_for_seed(self, seed: str) -> StoredGraph | None:
+        with self._lock:
+            graph_id = self._by_seed.get(seed)
+            return self._graphs.get(graph_id) if graph_id is not None else None
+
+
+_store: GraphStore | None = None
+_store_lock = threading.Lock()
+
+def get_graph_store() -> GraphStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = GraphStore(settings.GRAPH_STORE_MAX_GRAPHS)
+        return _store
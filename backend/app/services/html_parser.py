@@ -0,0 +1,224 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from ..core.config import settings
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxParser
+except ImportError:
+    _SelectolaxParser = None
+
+try:
+    import lxml.html as _lxml_html
+    from lxml import etree as _lxml_etree
+    import cssselect  # noqa: F401  (lxml's .cssselect() needs it)
+except ImportError:
+    _lxml_html = None
+
+# Fastest first; "auto" resolves to the first engine whose package is installed.
+ENGINE_ORDER = ("selectolax", "lxml", "bs4")
+
+# Every engine follows BeautifulSoup's html.parser output (the original scraper):
+# text inside these elements is left out of an ancestor's text, and <template>
+# content is inert, as in a browser: never matched and never part of any text.
+_OPAQUE_TAGS = frozenset({"script", "style", "template"})
+# Reported as "" when present, however they are written (lxml repeats the name).
+BOOLEAN_ATTRIBUTES = frozenset({
+    "allowfullscreen", "async", "autofocus", "autoplay", "checked", "controls", "default",
+    "defer", "disabled", "formnovalidate", "hidden", "inert", "ismap", "itemscope", "loop",
+    "multiple", "muted", "nomodule", "novalidate", "open", "playsinline", "readonly",
+    "required", "reversed", "selected",
+})
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+# html.parser collapses whitespace-only strings to "\n" (or " ") outside these.
+_PRESERVE_WHITESPACE_TAGS = frozenset({"pre", "textarea"})
+_ASCII_SPACES = " \n\t\f\r"
+
+
+def _collapse(text: str, preserve: bool) -> str:
+    if preserve or text.strip(_ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+class HtmlEngine(ABC):
+    name = ""
+
+    @abstractmethod
+    def parse(self, html: str):
+        ...
+
+    @abstractmethod
+    def select(self, node, selector: str) -> list:
+        # Matches in document order, each node once.
+        ...
+
+    def select_one(self, node, selector: str):
+        found = self.select(node, selector)
+        return found[0] if found else None
+
+    @abstractmethod
+    def tag(self, node) -> str:
+        ...
+
+    @abstractmethod
+    def text(self, node) -> str:
+        ...
+
+    @abstractmethod
+    def raw_attributes(self, node) -> Dict[str, str]:
+        ...
+
+    def attributes(self, node) -> Dict[str, str]:
+        attrs = self.raw_attributes(node)
+        for name in BOOLEAN_ATTRIBUTES.intersection(attrs):
+            if attrs[name].lower() == name:
+                attrs[name] = ""
+        return attrs
+
+    def links(self, html: str) -> List[str]:
+        doc = self.parse(html)
+        return [self.attributes(a).get("href") or "" for a in self.select(doc, "a[href]")]
+
+
+def _selectolax_ancestors(node):
+    node = node.parent
+    while node is not None:
+        yield node
+        node = node.parent
+
+
+class SelectolaxEngine(HtmlEngine):
+    name = "selectolax"
+
+    def parse(self, html: str):
+        return _SelectolaxParser(html)
+
+    def select(self, node, selector: str) -> list:
+        # Lexbor returns a selector group's matches in document order but repeats
+        # nodes matched by more than one of its selectors.
+        found = node.css(selector)
+        if len(found) < 2 or "," not in selector:
+            return found
+        seen = set()
+        return [n for n in found if not (n.mem_id in seen or seen.add(n.mem_id))]
+
+    def select_one(self, node, selector: str):
+        return node.css_first(selector)
+
+    def tag(self, node) -> str:
+        return node.tag
+
+    def text(self, node) -> str:
+        # Template content lives in a separate fragment, so templates read as "".
+        if node.tag in _OPAQUE_TAGS:
+            return node.text(deep=True, separator="", strip=False)
+        preserve = node.tag in _PRESERVE_WHITESPACE_TAGS or any(
+            parent.tag in _PRESERVE_WHITESPACE_TAGS for parent in _selectolax_ancestors(node)
+        )
+        parts = []
+        stack = [(child, preserve) for child in list(node.iter(include_text=True))[::-1]]
+        while stack:
+            child, preserve = stack.pop()
+            if child.tag == "-text":
+                parts.append(_collapse(child.text_content or "", preserve))
+            elif child.tag not in _OPAQUE_TAGS and not child.tag.startswith("-"):
+                # Comments and doctypes are "-comment" etc.
+                inner = preserve or child.tag in _PRESERVE_WHITESPACE_TAGS
+                stack.extend((c, inner) for c in list(child.iter(include_text=True))[::-1])
+        return "".join(parts)
+
+    def raw_attributes(self, node) -> Dict[str, str]:
+        return {k: v if v is not None else "" for k, v in node.attributes.items()}
+
+
+class LxmlEngine(HtmlEngine):
+    name = "lxml"
+
+    def parse(self, html: str):
+        # lxml refuses str input that carries an XML encoding declaration (XHTML).
+        html = _XML_DECLARATION.sub("", html, count=1)
+        if not html.strip():
+            return _lxml_html.document_fromstring("<html></html>")
+        try:
+            return _lxml_html.document_fromstring(html)
+        except _lxml_etree.ParserError:
+            # Nothing but comments or whitespace-like content.
+            return _lxml_html.document_fromstring("<html></html>")
+
+    def select(self, node, selector: str) -> list:
+        return [n for n in node.cssselect(selector) if next(n.iterancestors("template"), None) is None]
+
+    def tag(self, node) -> str:
+        return node.tag
+
+    def text(self, node) -> str:
+        if node.tag == "template":
+            return ""
+        if node.tag in _OPAQUE_TAGS:
+            return node.text_content()
+        parts = []
+
+        def walk(el, preserve: bool) -> None:
+            preserve = preserve or el.tag in _PRESERVE_WHITESPACE_TAGS
+            if el.text:
+                parts.append(_collapse(el.text, preserve))
+            for child in el:
+                # Comments and processing instructions have a non-string tag.
+                if isinstance(child.tag, str) and child.tag not in _OPAQUE_TAGS:
+                    walk(child, preserve)
+                if child.tail:
+                    parts.append(_collapse(child.tail, preserve))
+
+        walk(node, any(a.tag in _PRESERVE_WHITESPACE_TAGS for a in node.iterancestors()))
+        return "".join(parts)
+
+    def raw_attributes(self, node) -> Dict[str, str]:
+        return dict(node.attrib)
+
+
+class SoupEngine(HtmlEngine):
+    name = "bs4"
+
+    def parse(self, html: str):
+        # Keep multi-valued attributes such as class as the raw string, like the C engines.
+        return BeautifulSoup(html, "html.parser", multi_valued_attributes=None)
+
+    def select(self, node, selector: str) -> list:
+        return [n for n in node.select(selector) if n.find_parent("template") is None]
+
+    def tag(self, node) -> str:
+        return node.name
+
+    def text(self, node) -> str:
+        # get_text() already skips script, style and template strings below the node.
+        return "" if node.name == "template" else node.get_text()
+
+    def raw_attributes(self, node) -> Dict[str, str]:
+        return dict(node.attrs)
+
+
+_ENGINES = {
+    "selectolax": SelectolaxEngine if _SelectolaxParser is not None else None,
+    "lxml": LxmlEngine if _lxml_html is not None else None,
+    "bs4": SoupEngine,
+}
+
+
+def available_engines() -> List[str]:
+    return [name for name in ENGINE_ORDER if _ENGINES[name] is not None]
+
+
+def get_engine(name: Optional[str] = None) -> HtmlEngine:
+    name = (name or settings.HTML_PARSER).lower()
+    if name == "auto":
+        return _ENGINES[available_engines()[0]]()
+    if name not in _ENGINES:
+        raise ValueError(f"Unknown HTML parser: {name}")
+    engine = _ENGINES[name]
+    if engine is None:
+        raise ValueError(f"HTML parser '{name}' is not installed")
+    return engine()
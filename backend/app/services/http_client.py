@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+import httpx
+
+from ..core.config import settings
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; LoomBot/1.0)",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+_client: httpx.Client | None = None
+_async_client: httpx.AsyncClient | None = None
+_lock = threading.Lock()
+
+
+# Per-host semaphore plus the number of requests holding or waiting for it. The
+# entry is dropped when that reaches zero, so only hosts in use are kept.
+@dataclass
+class _HostSlot:
+    sem: Any
+    users: int = 0
+
+
+_host_sems: dict[str, _HostSlot] = {}
+_async_host_sems: dict[str, _HostSlot] = {}
+
+
+def _http2_enabled() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_kwargs() -> dict:
+    return {
+        "headers": DEFAULT_HEADERS,
+        "http2": _http2_enabled(),
+        "follow_redirects": True,
+        "timeout": httpx.Timeout(
+            timeout=None,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    }
+
+
+def init_http_clients() -> None:
+    global _client, _async_client
+    with _lock:
+        if _client is None:
+            _client = httpx.Client(**_client_kwargs())
+        if _async_client is None:
+            _async_client = httpx.AsyncClient(**_client_kwargs())
+
+
+async def close_http_clients() -> None:
+    global _client, _async_client
+    with _lock:
+        client, _client = _client, None
+        async_client, _async_client = _async_client, None
+        _async_host_sems.clear()
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.aclose()
+
+
+def get_http_client() -> httpx.Client:
+    if _client is None:
+        init_http_clients()
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    if _async_client is None:
+        init_http_clients()
+    return _async_client
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def _enter_slot(slots: dict[str, _HostSlot], host: str, new_sem) -> _HostSlot:
+    slot = slots.get(host)
+    if slot is None:
+        slot = slots[host] = _HostSlot(new_sem(settings.HTTP_MAX_CONNECTIONS_PER_HOST))
+    slot.users += 1
+    return slot
+
+
+def _leave_slot(slots: dict[str, _HostSlot], host: str, slot: _HostSlot) -> None:
+    slot.users -= 1
+    if not slot.users and slots.get(host) is slot:
+        del slots[host]
+
+
+@contextmanager
+def host_slot(url: str):
+    host = _host(url)
+    with _lock:
+        slot = _enter_slot(_host_sems, host, threading.BoundedSemaphore)
+    try:
+        with slot.sem:
+            yield
+    finally:
+        with _lock:
+            _leave_slot(_host_sems, host, slot)
+
+
+@asynccontextmanager
+async def async_host_slot(url: str):
+    host = _host(url)
+    slot = _enter_slot(_async_host_sems, host, asyncio.Semaphore)
+    try:
+        async with slot.sem:
+            yield
+    finally:
+        _leave_slot(_async_host_sems, host, slot)
+
+
+def fetch(url: str, **kwargs) -> httpx.Response:
+    with host_slot(url):
+        return get_http_client().get(url, **kwargs)
+
+
+async def afetch(url: str, **kwargs) -> httpx.Response:
+    async with async_host_slot(url):
+        return await get_async_http_client().get(url, **kwargs)
@@ -0,0 +1,190 @@
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from ..core.config import settings
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    client: str
+    run: Callable[["Job"], Awaitable[Any]]
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    # Set by the running job; returns counters for the status endpoint. "done" and
+    # "remaining" (units of work) are used for the ETA.
+    progress: Callable[[], dict] | None = None
+    result: Any = None
+    error: str | None = None
+    task: asyncio.Task | None = None
+
+    def info(self) -> dict:
+        progress = self.progress() if self.progress is not None else {}
+        eta = None
+        if self.status == RUNNING and progress.get("done"):
+            elapsed = time.time() - self.started_at
+            eta = round(elapsed / progress["done"] * progress.get("remaining", 0), 1)
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": progress,
+            "eta_seconds": eta,
+            "error": self.error,
+        }
+
+
+# Runs long operations (crawls, batch scrapes) as tasks on the server's event loop
+# instead of inside the request. At most `max_running` jobs run at once and at most
+# `max_running_per_client` of them for any one client; the rest wait in submission
+# order, skipping clients that are at their limit. A client with `max_pending_per_client`
+# jobs queued or running gets JobLimitExceeded. Finished jobs are kept `result_ttl`
+# seconds for their result to be fetched. All of this lives in the process, so a
+# job is only visible to the server worker that accepted it.
+class JobManager:
+    def __init__(
+        self,
+        max_running: int,
+        max_running_per_client: int,
+        max_pending_per_client: int,
+        result_ttl: float,
+    ):
+        self._max_running = max(1, max_running)
+        self._max_per_client = max(1, max_running_per_client)
+        self._max_pending = max(1, max_pending_per_client)
+        self._result_ttl = result_ttl
+        self._jobs: dict[str, Job] = {}
+        self._queue: list[Job] = []
+        self._running: dict[str, int] = defaultdict(int)
+
+    def submit(self, kind: str, client: str, run: Callable[[Job], Awaitable[Any]]) -> Job:
+        # Must be called from the event loop the jobs should run on.
+        self._prune()
+        pending = sum(1 for j in self._jobs.values() if j.client == client and j.status not in FINISHED)
+        if pending >= self._max_pending:
+            raise JobLimitExceeded(f"At most {self._max_pending} unfinished jobs per client")
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, client=client, run=run)
+        self._jobs[job.job_id] = job
+        self._queue.append(job)
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def for_client(self, client: str) -> list[Job]:
+        self._prune()
+        return [j for j in self._jobs.values() if j.client == client]
+
+    def cancel(self, job_id: str) -> Job | None:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        if job.status == QUEUED:
+            self._queue.remove(job)
+            self._finish(job, CANCELLED)
+        else:
+            # Reported as cancelled once the task has unwound.
+            job.task.cancel()
+        return job
+
+    def stats(self) -> dict:
+        return {
+            "max_running": self._max_running,
+            "max_running_per_client": self._max_per_client,
+            "running": sum(self._running.values()),
+            "queued": len(self._queue),
+        }
+
+    async def shutdown(self) -> None:
+        # Waits for the cancelled jobs to unwind, so their cleanup (e.g. a crawl
+        # checkpointing and releasing its claims) runs before shared resources close.
+        for job in self._queue:
+            self._finish(job, CANCELLED)
+        self._queue.clear()
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _dispatch(self) -> None:
+        running = sum(self._running.values())
+        for job in list(self._queue):
+            if running >= self._max_running:
+                return
+            if self._running[job.client] >= self._max_per_client:
+                continue
+            self._queue.remove(job)
+            self._running[job.client] += 1
+            running += 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        try:
+            job.result = await job.run(job)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            self._finish(job, FAILED)
+        else:
+            self._finish(job, DONE)
+        finally:
+            self._running[job.client] -= 1
+            if not self._running[job.client]:
+                del self._running[job.client]
+            self._dispatch()
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.task = None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self._result_ttl
+        expired = [
+            job_id for job_id, j in self._jobs.items()
+            if j.status in FINISHED and j.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_manager: JobManager | None = None
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager(
+            max_running=settings.JOBS_MAX_RUNNING,
+            max_running_per_client=settings.JOBS_MAX_RUNNING_PER_CLIENT,
+            max_pending_per_client=settings.JOBS_MAX_PENDING_PER_CLIENT,
+            result_ttl=settings.JOBS_RESULT_TTL,
+        )
+    return _manager
+
+async def close_job_manager() -> None:
+    global _manager
+    manager, _manager = _manager, None
+    if manager is not None:
+        await manager.shutdown()
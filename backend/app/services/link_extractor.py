@@ -0,0 +1,133 @@
+from html.parser import HTMLParser
+from typing import Callable
+from urllib.parse import urljoin, urldefrag
+
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
+_SKIP_PREFIXES = ("mailto:", "tel:", "javascript:")
+
+
+class _LimitReached(Exception):
+    pass
+
+
+def _strip_fragment(u: str) -> str:
+    return urldefrag(u)[0]
+
+
+# Event-driven <a href> collector. Chunks are fed as they arrive, no tree is built,
+# and tokenizing stops as soon as `limit` usable links have been collected. Uses
+# lxml's C tokenizer when installed and the stdlib HTMLParser otherwise.
+class LinkExtractor:
+    def __init__(
+        self,
+        base_url: str,
+        limit: int | None = None,
+        use_base_tag: bool = True,
+        normalize: Callable[[str], str] | None = None,
+    ):
+        self.base_url = base_url
+        self.limit = limit
+        self.use_base_tag = use_base_tag
+        self.normalize = normalize or _strip_fragment
+        self.links: list[str] = []
+        self.done = False
+        self._seen_anchor = False
+        if _lxml_etree is not None:
+            self._parser = _lxml_etree.HTMLParser(target=_LxmlTarget(self))
+        else:
+            self._parser = _StdlibParser(self)
+
+    def feed(self, chunk: str) -> bool:
+        if self.done:
+            return True
+        try:
+            self._parser.feed(chunk)
+        except _LimitReached:
+            self.done = True
+        return self.done
+
+    def close(self) -> list[str]:
+        if not self.done:
+            try:
+                self._parser.close()
+            except _LimitReached:
+                pass
+            except Exception:
+                # Truncated or malformed input: keep whatever was collected.
+                pass
+            self.done = True
+        return self.links
+
+    def _start(self, tag: str, href: str | None) -> None:
+        if tag == "base":
+            # Only a <base> that precedes every anchor can change how they resolve.
+            if self.use_base_tag and href and not self._seen_anchor:
+                self.base_url = urljoin(self.base_url, href.strip())
+            return
+
+        self._seen_anchor = True
+        if not href:
+            return
+        href = href.strip()
+        if not href or href[:11].lower().startswith(_SKIP_PREFIXES):
+            return
+
+        abs_url = self.normalize(urljoin(self.base_url, href))
+        if not abs_url.startswith(("http://", "https://")):
+            return
+
+        self.links.append(abs_url)
+        if self.limit is not None and len(self.links) >= self.limit:
+            raise _LimitReached()
+
+
+class _LxmlTarget:
+    def __init__(self, extractor: LinkExtractor):
+        self._extractor = extractor
+
+    def start(self, tag, attrib):
+        if tag == "a" or tag == "base":
+            self._extractor._start(tag, attrib.get("href"))
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return None
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, extractor: LinkExtractor):
+        super().__init__(convert_charrefs=True)
+        self._extractor = extractor
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" or tag == "base":
+            self._extractor._start(tag, dict(attrs).get("href"))
+
+    handle_startendtag = handle_starttag
+
+
+def extract_links_streaming(
+    base_url: str,
+    html: str,
+    limit: int | None = None,
+    use_base_tag: bool = True,
+    normalize: Callable[[str], str] | None = None,
+    chunk_size: int = 64 * 1024,
+) -> list[str]:
+    extractor = LinkExtractor(base_url, limit=limit, use_base_tag=use_base_tag, normalize=normalize)
+    for i in range(0, len(html), chunk_size):
+        if extractor.feed(html[i:i + chunk_size]):
+            break
+    return extractor.close()
@@ -1,175 +1,838 @@
 import asyncio
-import hashlib
-import re
-from collections import defaultdict
-from urllib.parse import urljoin, urldefrag, urlparse
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Awaitable, Callable
+from urllib.parse import urlparse
 
 import httpx
-from bs4 import BeautifulSoup
-
-def _norm_url(u: str) -> str:
-    u, _ = urldefrag(u)
-    return u.rstrip("/")
-
-def _url_id(u: str) -> str:
-    return hashlib.sha1(u.encode("utf-8")).hexdigest()[:12]
+from ..core.config import settings
+from .crawl_scheduler import HostScheduler, RobotsCache, host_of, parse_retry_after
+from .fetch_cache import CachedPage, get_fetch_cache
+from .content_fingerprint import ContentIndex, content_digest
+from .crawl_frontier import CrawlJob, PageResult, get_crawl_frontier
+from .crawl_parse import norm_url, parse_links_async
+from .graph_store import StoredGraph, get_graph_store
+from .pagerank import pagerank_indexed
+from .url_canon import get_canonicalizer
+from .url_graph import CrawlGraph, new_url_interner, url_fingerprint
+from .http_client import get_async_http_client
+
+logger = logging.getLogger(__name__)
 
 def _domain(u: str) -> str:
     return urlparse(u).netloc.lower()
 
-def extract_links(base_url: str, html: str) -> list[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    out: list[str] = []
-    for a in soup.select("a[href]"):
-        href = (a.get("href") or "").strip()
-        if not href:
-            continue
-        if re.match(r"^(mailto:|tel:|javascript:)", href, re.I):
-            continue
-        abs_url = urljoin(base_url, href)
-        abs_url = _norm_url(abs_url)
-        if not (abs_url.startswith("http://") or abs_url.startswith("https://")):
-            continue
-        out.append(abs_url)
-    return out
-
-DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; STA220Bot/1.0)"}
+ROBOTS_USER_AGENT = "STA220Bot"
+DEFAULT_HEADERS = {"User-Agent": f"Mozilla/5.0 (compatible; {ROBOTS_USER_AGENT}/1.0)"}
 
 MAX_LINKS_PER_PAGE = 250
 CONNECT_TIMEOUT = 5.0
 READ_TIMEOUT = 10.0
 MAX_CONCURRENCY = 20
+# Non-canonical link spellings remembered per crawl for the duplicates_avoided count
+MAX_VARIANT_SPELLINGS = 100_000
+# Frames stream_graph holds for a slow client before the crawl waits for it
+STREAM_EVENT_BUFFER = 1000
+FETCH_TIMEOUT = httpx.Timeout(timeout=None, connect=CONNECT_TIMEOUT, read=READ_TIMEOUT)
 
 def _is_html_response(resp: httpx.Response) -> bool:
     ct = resp.headers.get("content-type", "").lower()
     return "text/html" in ct or "application/xhtml+xml" in ct or ct.startswith("text/html")
 
-async def _fetch_html(
-    client: httpx.AsyncClient,
-    sem: asyncio.Semaphore,
-    url: str,
-) -> tuple[str, str] | None:
-    async with sem:
-        try:
-            resp = await client.get(url, follow_redirects=True)
+@dataclass
+class CrawlStats:
+    started_at: float = field(default_factory=time.monotonic)
+    pages_fetched: int = 0
+    fetch_errors: int = 0
+    # Pages a worker failed on unexpectedly (logged; the worker carries on)
+    worker_errors: int = 0
+    queued: int = 0
+    discovered: int = 0
+    edges: int = 0
+    cache_hits: int = 0
+    cache_revalidated: int = 0
+    # Links that only differed from an already-known URL in spelling (port, case,
+    # tracking params, query order, ...) and so were not fetched again
+    duplicates_avoided: int = 0
+    # Memory held by the URL index (dedup structure plus the URL strings)
+    url_bytes_per_url: float = 0.0
+    # Link extraction, measured inside the parse workers
+    parse_workers: int = 0
+    pages_parsed: int = 0
+    parse_bytes: int = 0
+    parse_cpu_seconds: float = 0.0
+    # Content dedup: pages checked, byte-identical copies and SimHash near-duplicates
+    pages_checked: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    # Streamed downloads
+    bytes_downloaded: int = 0
+    non_html_skipped: int = 0
+    pages_truncated: int = 0
+
+    def as_dict(self) -> dict:
+        out = asdict(self)
+        out.pop("started_at")
+        out["elapsed_seconds"] = round(time.monotonic() - self.started_at, 3)
+        out["parse_cpu_seconds"] = round(self.parse_cpu_seconds, 3)
+        out["dedup_ratio"] = (
+            round((self.exact_duplicates + self.near_duplicates) / self.pages_checked, 4)
+            if self.pages_checked else 0.0
+        )
+        # Pages per second all parse workers could sustain at the measured CPU cost.
+        out["parse_capacity_pages_per_second"] = (
+            round(self.pages_parsed / self.parse_cpu_seconds * max(1, self.parse_workers), 1)
+            if self.parse_cpu_seconds else None
+        )
+        return out
+
+@dataclass
+class _Fetched:
+    status: int | None
+    body: bytes | None = None
+    encoding: str | None = None
+    retry_after: float | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+    # Not HTML: closed without reading the body
+    skipped: bool = False
+    # Body cut at CRAWL_MAX_PAGE_BYTES (bodies that reach it count as cut)
+    truncated: bool = False
+    # Queued again: throttled, or a cache lookup that missed
+    retrying: bool = False
+
+def _at_size_cap(body: bytes) -> bool:
+    return len(body) >= settings.CRAWL_MAX_PAGE_BYTES
+
+async def _fetch_html(client: httpx.AsyncClient, url: str, cached: CachedPage | None = None) -> _Fetched:
+    # Streams the response: status and headers are checked before any of the body
+    # is read, non-HTML is dropped unread and bodies stop at CRAWL_MAX_PAGE_BYTES.
+    headers = DEFAULT_HEADERS
+    if cached is not None:
+        headers = dict(DEFAULT_HEADERS)
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    try:
+        async with client.stream("GET", url, headers=headers, timeout=FETCH_TIMEOUT) as resp:
+            if resp.status_code == 304 and cached is not None:
+                return _Fetched(
+                    status=cached.status,
+                    body=cached.body,
+                    encoding=cached.encoding,
+                    not_modified=True,
+                    truncated=_at_size_cap(cached.body),
+                )
             if resp.status_code >= 400:
-                return None
+                return _Fetched(
+                    status=resp.status_code,
+                    retry_after=parse_retry_after(resp.headers.get("retry-after")),
+                )
             if not _is_html_response(resp):
-                return None
-            return url, resp.text
-        except Exception:
+                return _Fetched(status=resp.status_code, skipped=True)
+
+            max_bytes = settings.CRAWL_MAX_PAGE_BYTES
+            body = bytearray()
+            truncated = False
+            async for chunk in resp.aiter_bytes():
+                body += chunk
+                if len(body) >= max_bytes:
+                    # Counted as cut even if the page ends right here (see _Fetched).
+                    truncated = True
+                    del body[max_bytes:]
+                    break
+            return _Fetched(
+                status=resp.status_code,
+                body=bytes(body),
+                encoding=resp.charset_encoding,
+                etag=resp.headers.get("etag"),
+                last_modified=resp.headers.get("last-modified"),
+                truncated=truncated,
+            )
+    except Exception:
+        return _Fetched(status=None)
+
+def _new_scheduler() -> HostScheduler:
+    return HostScheduler(
+        per_host_concurrency=settings.CRAWL_PER_HOST_CONCURRENCY,
+        min_delay=settings.CRAWL_MIN_HOST_DELAY,
+        max_backoff=settings.CRAWL_MAX_BACKOFF,
+    )
+
+def _new_content_index() -> ContentIndex | None:
+    if not settings.CRAWL_CONTENT_DEDUP:
+        return None
+    return ContentIndex(settings.CRAWL_NEAR_DUP_MAX_DISTANCE)
+
+# Fetch side of a crawl: fresh fetch-cache hits, robots.txt, the request itself,
+# 429/503 retries and cache upkeep. Queue items are (url, node, depth, attempt, lookup,
+# cached), `cached` being the fetch-cache entry a lookup found, if any.
+class _PageFetcher:
+    def __init__(self, scheduler: HostScheduler, stats: CrawlStats):
+        self.client = get_async_http_client()
+        self.scheduler = scheduler
+        self.stats = stats
+        self.robots = (
+            RobotsCache(self.client, ROBOTS_USER_AGENT, headers=DEFAULT_HEADERS, timeout=READ_TIMEOUT)
+            if settings.CRAWL_RESPECT_ROBOTS else None
+        )
+        # With a fetch cache, new URLs are first looked up in it (`lookup` items, which
+        # bypass the per-host queues). Pages still fresh are served from disk, the rest
+        # go to their host's queue with the stale entry, which is revalidated with a
+        # conditional GET.
+        self.cache = get_fetch_cache()
+        # Pages deeper than this are no longer fetched (see crawl_link_graph).
+        self.max_depth: int | None = None
+
+    def _too_deep(self, depth: int) -> bool:
+        return self.max_depth is not None and depth > self.max_depth
+
+    def schedule(self, url: str, node: int, depth: int) -> None:
+        lookup = self.cache is not None
+        self.scheduler.put(url, node, depth, 0, lookup, None, polite=not lookup)
+
+    async def fetch(
+        self, url: str, node: int, depth: int, attempt: int, lookup: bool, cached: CachedPage | None
+    ) -> _Fetched | None:
+        # Returns the page (body set when there is HTML to parse) or None if robots.txt
+        # disallows it or it is past max_depth. A throttled page, or a lookup the cache
+        # cannot answer, is queued again and comes back with `retrying`.
+        stats, cache = self.stats, self.cache
+        if self._too_deep(depth):
             return None
+        if lookup:
+            cached = await cache.aget(url)
+            if cached is not None and cache.is_fresh(cached):
+                stats.cache_hits += 1
+                return _Fetched(
+                    status=cached.status,
+                    body=cached.body,
+                    encoding=cached.encoding,
+                    truncated=_at_size_cap(cached.body),
+                )
+            if self._too_deep(depth):
+                # The crawl filled up while the cache was read.
+                return None
+            self.scheduler.put(url, node, depth, attempt, False, cached)
+            return _Fetched(status=None, retrying=True)
 
-async def crawl_link_graph(seed_url: str, max_hops: int, max_pages: int, same_domain_only: bool):
-    seed_url = _norm_url(seed_url)
+        if self.robots is not None:
+            if not await self.robots.allowed(url):
+                return None
+            self.scheduler.set_crawl_delay(host_of(url), await self.robots.crawl_delay(url))
+
+        fetched = await _fetch_html(self.client, url, cached)
+        if fetched.status in (429, 503) and attempt < settings.CRAWL_MAX_RETRIES:
+            self.scheduler.put(url, node, depth, attempt + 1, False, cached)
+            fetched.retrying = True
+            return fetched
+        if fetched.status is None or fetched.status >= 400:
+            stats.fetch_errors += 1
+        if fetched.skipped:
+            stats.non_html_skipped += 1
+        if fetched.body is None:
+            return fetched
+        if not fetched.not_modified:
+            stats.bytes_downloaded += len(fetched.body)
+            if fetched.truncated:
+                stats.pages_truncated += 1
+        if fetched.not_modified:
+            stats.cache_revalidated += 1
+            await cache.atouch(url)
+        elif cache is not None:
+            await cache.aput(
+                url, fetched.status, fetched.body, fetched.encoding, fetched.etag, fetched.last_modified
+            )
+        stats.pages_fetched += 1
+        return fetched
+
+async def _parse_page(
+    url: str, node: int, fetched: _Fetched, content: ContentIndex | None, stats: CrawlStats
+) -> tuple[list[tuple[str, str]], int | None, bool]:
+    # Returns (links, None, False) for a new page, or ([], original, exact) when its
+    # content was already seen (byte-identical, or within the SimHash distance); such
+    # pages are neither parsed nor expanded. Truncated bodies are only matched exactly:
+    # the SimHash of a prefix says little about the whole page.
+    stats.pages_checked += 1
+    if content is not None:
+        original = content.exact(content_digest(fetched.body), node)
+        if original is not None:
+            return [], original, True
+
+    links, cpu_seconds, simhash = await parse_links_async(
+        url,
+        fetched.body,
+        fetched.encoding,
+        MAX_LINKS_PER_PAGE,
+        simhash=content is not None and not fetched.truncated,
+    )
+    stats.pages_parsed += 1
+    stats.parse_bytes += len(fetched.body)
+    stats.parse_cpu_seconds += cpu_seconds
+
+    if simhash is not None:
+        original = content.near(simhash)
+        if original is not None:
+            return [], original, False
+        content.add_near(simhash, node)
+    return links, None, False
+
+async def crawl_link_graph(
+    seed_url: str,
+    max_hops: int,
+    max_pages: int,
+    same_domain_only: bool,
+    stats: CrawlStats | None = None,
+    on_event: Callable[[dict], Awaitable[None]] | None = None,
+):
+    # `stats` is updated in place while crawling; `on_event` receives a "node" dict for
+    # every discovered (or re-depthed) URL and an "edge" dict for every new edge.
+    # Workers wait for it after each page, so a slow consumer slows the crawl down.
+    canonical = get_canonicalizer()
+    seed_spelling = norm_url(seed_url)
+    seed_url = canonical(seed_url)
     seed_domain = _domain(seed_url)
-
-    discovered: set[str] = set([seed_url])
-    depth_map: dict[str, int] = {seed_url: 0}
-    edges: set[tuple[str, str]] = set()
-
-    frontier: list[str] = [seed_url]
-
-    limits = httpx.Limits(max_connections=MAX_CONCURRENCY * 2, max_keepalive_connections=MAX_CONCURRENCY * 2)
-    timeout = httpx.Timeout(timeout=None, connect=CONNECT_TIMEOUT, read=READ_TIMEOUT)
-    sem = asyncio.Semaphore(MAX_CONCURRENCY)
-
-    async with httpx.AsyncClient(headers=DEFAULT_HEADERS, limits=limits, timeout=timeout) as client:
-        for d in range(0, max_hops):
-            if not frontier:
-                break
-            if len(discovered) >= max_pages:
-                break
-
-            tasks = [asyncio.create_task(_fetch_html(client, sem, u)) for u in frontier]
-            results = await asyncio.gather(*tasks)
-
-            next_frontier: list[str] = []
-
-            for item in results:
-                if not item:
+    stats = stats if stats is not None else CrawlStats()
+
+    # URLs are interned to dense ids on discovery; depths and edges are stored
+    # per id in flat arrays.
+    graph = CrawlGraph(urls=new_url_interner(max_pages))
+    graph.add_node(seed_url, 0)
+
+    # Links arrive as the old fragment/trailing-slash normalization spelled them.
+    # Spellings already canonical are flagged per node; the (rarer) others are kept
+    # as 64-bit fingerprints, up to MAX_VARIANT_SPELLINGS of them (past that, repeats
+    # of unrecorded spellings are counted again). A new spelling of a known node is
+    # a fetch the canonicalizer saved.
+    canonical_seen = bytearray()
+    variant_seen: set[int] = set()
+
+    def note_spelling(node: int, spelling: str, url: str) -> bool:
+        if spelling == url:
+            if node >= len(canonical_seen):
+                canonical_seen.extend(bytes(node + 1 - len(canonical_seen)))
+            new = not canonical_seen[node]
+            canonical_seen[node] = 1
+        else:
+            key = url_fingerprint(spelling)
+            new = key not in variant_seen
+            if new and len(variant_seen) < MAX_VARIANT_SPELLINGS:
+                variant_seen.add(key)
+        return new
+
+    note_spelling(0, seed_spelling, seed_url)
+
+    # Continuous work queue: MAX_CONCURRENCY workers keep fetches in flight instead of
+    # waiting for a whole hop to finish. The scheduler spreads them across hosts with
+    # per-host limits; `scheduled` flags every node ever queued.
+    scheduler = _new_scheduler()
+    fetcher = _PageFetcher(scheduler, stats)
+    scheduled = bytearray()
+    # Once max_pages is reached only pages no deeper than the one that filled the
+    # graph are still fetched, mirroring the old "finish the current hop" behaviour.
+    full_at_depth: int | None = None
+    content = _new_content_index()
+
+    # Events are buffered in the order they happen and handed to `on_event` by one
+    # worker at a time, so a node always goes out before the edges that point at it.
+    outbox: deque[dict] = deque()
+    sending = asyncio.Lock()
+
+    def emit(event: dict) -> None:
+        if on_event is not None:
+            outbox.append(event)
+
+    async def flush() -> None:
+        async with sending:
+            while outbox:
+                await on_event(outbox.popleft())
+
+    def emit_node(node: int) -> None:
+        if on_event is not None:
+            url = graph.urls.url(node)
+            emit({
+                "type": "node",
+                "id": str(node),
+                "url": url,
+                "domain": _domain(url),
+                "depth": graph.depth[node],
+            })
+
+    def schedule(node: int, depth: int) -> None:
+        if node >= len(scheduled):
+            scheduled.extend(bytes(node + 1 - len(scheduled)))
+        if depth < max_hops and not scheduled[node]:
+            scheduled[node] = 1
+            fetcher.schedule(graph.urls.url(node), node, depth)
+
+    def expand(cur: int, depth: int, links: list[tuple[str, str]]) -> None:
+        # Each page is expanded at most once, so edges only need deduplicating per page.
+        nonlocal full_at_depth
+        targets: set[int] = set()
+        for spelling, nxt_url in links:
+            if same_domain_only and _domain(nxt_url) != seed_domain:
+                continue
+
+            nxt = graph.urls.get(nxt_url)
+            if nxt is None:
+                if full_at_depth is not None:
                     continue
-                cur_url, html = item
-
-                links = extract_links(cur_url, html)
-                if len(links) > MAX_LINKS_PER_PAGE:
-                    links = links[:MAX_LINKS_PER_PAGE]
-
-                for nxt in links:
-                    if same_domain_only and _domain(nxt) != seed_domain:
+                nxt, _ = graph.add_node(nxt_url, depth + 1)
+                note_spelling(nxt, spelling, nxt_url)
+                emit_node(nxt)
+                schedule(nxt, depth + 1)
+                if len(graph.urls) >= max_pages:
+                    full_at_depth = fetcher.max_depth = depth
+                    scheduler.drop(lambda item: item[2] > depth)
+            else:
+                if note_spelling(nxt, spelling, nxt_url):
+                    stats.duplicates_avoided += 1
+                if nxt in graph.alias:
+                    nxt = graph.resolve(nxt)
+                    if nxt == cur:
                         continue
-
-                    edges.add((cur_url, nxt))
-
-                    if nxt not in discovered:
-                        discovered.add(nxt)
-                        depth_map[nxt] = d + 1
-                        next_frontier.append(nxt)
-
-                        if len(discovered) >= max_pages:
-                            break
-                if len(discovered) >= max_pages:
-                    break
-
-            frontier = next_frontier
-
-    return seed_url, discovered, depth_map, edges
-
-def pagerank(urls: list[str], edges: list[tuple[str, str]], damping: float = 0.85, iters: int = 30):
-    outlinks = defaultdict(list)
-    inlinks = defaultdict(list)
-
-    for s, t in edges:
-        outlinks[s].append(t)
-        inlinks[t].append(s)
-
-    n = len(urls)
-    if n == 0:
-        return {}
-
-    pr = {u: 1.0 / n for u in urls}
-
-    for _ in range(iters):
-        new_pr = {}
-        base = (1.0 - damping) / n
-        for u in urls:
-            rank_sum = 0.0
-            for v in inlinks.get(u, []):
-                outdeg = len(outlinks.get(v, []))
-                if outdeg:
-                    rank_sum += pr[v] / outdeg
-            new_pr[u] = base + damping * rank_sum
-        pr = new_pr
-
-    s = sum(pr.values()) or 1.0
-    for u in pr:
-        pr[u] /= s
-    return pr
-
-async def build_graph_response(seed_url: str, max_hops: int, max_pages: int, same_domain_only: bool):
-    seed, nodes_set, depth_map, edge_set = await crawl_link_graph(seed_url, max_hops, max_pages, same_domain_only)
-
-    urls = sorted(nodes_set, key=lambda u: (depth_map.get(u, 999), u))
-    edges = [(s, t) for (s, t) in edge_set if s in nodes_set and t in nodes_set]
-
-    pr = pagerank(urls, edges)
+                if depth + 1 < graph.depth[nxt]:
+                    # Reached through a shorter path than the one that discovered it first.
+                    graph.depth[nxt] = depth + 1
+                    emit_node(nxt)
+                    schedule(nxt, depth + 1)
+
+            if nxt not in targets:
+                targets.add(nxt)
+                graph.edges.append(cur, nxt)
+                emit({"type": "edge", "source": str(cur), "target": str(nxt)})
+
+        stats.discovered = len(graph.urls)
+        stats.edges = len(graph.edges)
+        stats.url_bytes_per_url = round(graph.urls.nbytes / len(graph.urls), 1)
+
+    def mark_duplicate(node: int, original: int, exact: bool) -> None:
+        original = graph.resolve(original)
+        graph.alias[node] = original
+        if exact:
+            stats.exact_duplicates += 1
+        else:
+            stats.near_duplicates += 1
+        emit({"type": "alias", "id": str(node), "canonical": str(original)})
+
+    async def process(url: str, node: int, depth: int, fetched: _Fetched) -> None:
+        links, original, exact = await _parse_page(url, node, fetched, content, stats)
+        if original is not None:
+            mark_duplicate(node, original, exact)
+        else:
+            expand(node, depth, links)
+
+    async def worker() -> None:
+        while True:
+            item = await scheduler.get()
+            if item is None:
+                return
+            url, node, depth, attempt, lookup, cached = item
+            fetched = None
+            try:
+                try:
+                    fetched = await fetcher.fetch(url, node, depth, attempt, lookup, cached)
+                finally:
+                    if not lookup:
+                        scheduler.release(
+                            url,
+                            status=fetched.status if fetched else None,
+                            retry_after=fetched.retry_after if fetched else None,
+                        )
+                # Parsing runs in the parse pool after the host slot is released, so
+                # the next request to this host is not held up by it.
+                if fetched is not None and fetched.body is not None:
+                    await process(url, node, depth, fetched)
+                    await flush()
+            except Exception:
+                stats.worker_errors += 1
+                logger.exception("Crawl worker failed on %s", url)
+            finally:
+                scheduler.task_done()
+                stats.queued = scheduler.pending
+
+    emit_node(0)
+    stats.discovered = 1
+    stats.parse_workers = max(0, settings.CRAWL_PARSE_WORKERS)
+    if len(graph.urls) < max_pages:
+        schedule(0, 0)
+
+    await flush()
+
+    workers = [asyncio.create_task(worker()) for _ in range(MAX_CONCURRENCY)]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for w in workers:
+            w.cancel()
+    await flush()
+
+    graph.collapse_aliases()
+    stats.edges = len(graph.edges)
+    return graph
+
+def create_crawl_job(seed_url: str, max_hops: int, max_pages: int, same_domain_only: bool) -> CrawlJob:
+    frontier = get_crawl_frontier()
+    crawl_id = frontier.create(get_canonicalizer()(seed_url), max_hops, max_pages, same_domain_only)
+    return frontier.get(crawl_id)
+
+async def run_crawl_job(crawl_id: str, stats: CrawlStats | None = None) -> CrawlGraph:
+    # Works on a durable crawl (see CrawlFrontier) until its frontier is empty. The
+    # workers run throughout; a feeder claims the next batch of URLs whenever fewer
+    # than half a batch are left locally, so a slow host or a backoff only holds up
+    # its own URLs. Results are checkpointed every CRAWL_JOB_CHECKPOINT_INTERVAL
+    # seconds and before each claim. Any number of processes can run the same crawl;
+    # running it again resumes an interrupted one.
+    frontier = get_crawl_frontier()
+    job = await asyncio.to_thread(frontier.get, crawl_id)
+    if job is None:
+        raise KeyError(crawl_id)
+    seed_domain = _domain(job.seed)
+    stats = stats if stats is not None else CrawlStats()
+    stats.parse_workers = max(0, settings.CRAWL_PARSE_WORKERS)
+
+    scheduler = _new_scheduler()
+    fetcher = _PageFetcher(scheduler, stats)
+    # Near duplicates are only detected among the pages this process parses;
+    # byte-identical ones are matched across processes by the frontier.
+    content = _new_content_index()
+    claimed: set[int] = set()
+    results: list[PageResult] = []
+    last_checkpoint = time.monotonic()
+    # Frontier updates are shielded from cancellation and waited for before claims
+    # are given back, so none lands after the interrupt or misses its bookkeeping.
+    updates: set[asyncio.Task] = set()
+
+    def shielded(coro) -> asyncio.Future:
+        task = asyncio.ensure_future(coro)
+        updates.add(task)
+        task.add_done_callback(updates.discard)
+        return asyncio.shield(task)
+
+    async def checkpoint() -> None:
+        nonlocal results, last_checkpoint
+        batch, results = results, []
+        last_checkpoint = time.monotonic()
+        await shielded(save(batch))
+
+    async def save(batch: list[PageResult]) -> None:
+        if batch:
+            await asyncio.to_thread(frontier.complete, crawl_id, batch)
+            claimed.difference_update(r.node for r in batch)
+        if claimed:
+            await asyncio.to_thread(frontier.renew, crawl_id, list(claimed), settings.CRAWL_JOB_LEASE)
+        job = await asyncio.to_thread(frontier.get, crawl_id)
+        stats.discovered = job.discovered
+        stats.edges = job.edges
+        stats.queued = job.queued + job.claimed
+
+    async def claim() -> list[tuple[int, str, int]]:
+        batch = await asyncio.to_thread(
+            frontier.claim, crawl_id, settings.CRAWL_JOB_CLAIM_BATCH, settings.CRAWL_JOB_LEASE
+        )
+        claimed.update(node for node, _, _ in batch)
+        return batch
+
+    async def crawl_page(url: str, node: int, depth: int, fetched: _Fetched | None) -> PageResult:
+        result = PageResult(node, depth)
+        if fetched is None or fetched.body is None:
+            return result
+        links, original, exact = await _parse_page(url, node, fetched, content, stats)
+        if original is not None:
+            result.alias_of = original
+            if exact:
+                stats.exact_duplicates += 1
+            else:
+                stats.near_duplicates += 1
+            return result
+        if content is not None:
+            result.digest = content_digest(fetched.body)
+        result.links = [
+            u for _, u in links if not job.same_domain_only or _domain(u) == seed_domain
+        ]
+        return result
+
+    async def worker() -> None:
+        while True:
+            item = await scheduler.get()
+            if item is None:
+                return
+            url, node, depth, attempt, lookup, cached = item
+            fetched = None
+            try:
+                try:
+                    fetched = await fetcher.fetch(url, node, depth, attempt, lookup, cached)
+                finally:
+                    if not lookup:
+                        scheduler.release(
+                            url,
+                            status=fetched.status if fetched else None,
+                            retry_after=fetched.retry_after if fetched else None,
+                        )
+                if fetched is None or not fetched.retrying:
+                    # Bound after the await: a checkpoint may swap the list meanwhile.
+                    result = await crawl_page(url, node, depth, fetched)
+                    results.append(result)
+            except Exception:
+                stats.worker_errors += 1
+                logger.exception("Crawl worker failed on %s", url)
+                # Done without links, rather than left claimed until the lease runs out.
+                results.append(PageResult(node, depth))
+            finally:
+                scheduler.task_done()
+            if local() < low_water:
+                low.set()
+            if time.monotonic() - last_checkpoint >= settings.CRAWL_JOB_CHECKPOINT_INTERVAL:
+                await checkpoint()
+
+    # The feeder holds one pending slot in the scheduler until the crawl is over.
+    low_water = max(1, settings.CRAWL_JOB_CLAIM_BATCH // 2)
+    low = asyncio.Event()
+    local = lambda: scheduler.pending - 1
+
+    async def feed() -> None:
+        try:
+            while True:
+                await low.wait()
+                low.clear()
+                # Saved results may hold the links there are left to claim.
+                if results:
+                    await checkpoint()
+                if updates:
+                    await asyncio.wait(updates)
+                batch = await shielded(claim())
+                for node, url, depth in batch:
+                    fetcher.schedule(url, node, depth)
+                if batch:
+                    # Claim again once the workers have drained the queue some more.
+                    if local() < low_water:
+                        low.set()
+                    continue
+                if local() > 0:
+                    continue
+                if results:
+                    # The last pages finished while claiming; save them and look again.
+                    low.set()
+                    continue
+                if await asyncio.to_thread(frontier.outstanding, crawl_id) == 0:
+                    return
+                # Other processes still hold claims whose results may add URLs.
+                await asyncio.sleep(1.0)
+                low.set()
+        finally:
+            scheduler.task_done()
+
+    async def give_back() -> None:
+        # Stopped early: keep what was fetched and give the rest back.
+        if updates:
+            await asyncio.wait(updates)
+        unfinished = list(claimed.difference(r.node for r in results))
+        await asyncio.to_thread(frontier.interrupt, crawl_id, results, unfinished)
+
+    finished = False
+    try:
+        await asyncio.to_thread(frontier.set_status, crawl_id, "running")
+        scheduler.hold()
+        low.set()
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(worker()) for _ in range(MAX_CONCURRENCY)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+        await checkpoint()
+        finished = True
+    finally:
+        if not finished:
+            await asyncio.shield(give_back())
+
+    await asyncio.to_thread(frontier.set_status, crawl_id, "done")
+    graph = await asyncio.to_thread(frontier.load_graph, crawl_id)
+    stats.discovered = len(graph.urls)
+    stats.edges = len(graph.edges)
+    stats.queued = 0
+    return graph
+
+def rank_graph(
+    stored: StoredGraph,
+    teleport: tuple[str, ...] = (),
+    warm_start: bool = True,
+    previous: StoredGraph | None = None,
+) -> dict:
+    # Plain PageRank when `teleport` is empty, otherwise random jumps only land on
+    # those URLs. The rank vector is kept on `stored` for the next warm start.
+    graph = stored.graph
+    n = len(graph.urls)
+    personalization = None
+    if teleport:
+        personalization = [0.0] * n
+        for u in teleport:
+            personalization[graph.resolve(graph.urls.get(u))] = 1.0
+    elif graph.alias:
+        # Duplicate pages have no edges left; keeping random jumps off them as
+        # well gives them zero rank, as if they had been removed.
+        personalization = [1.0] * n
+        for node in graph.alias:
+            personalization[node] = 0.0
+    start = _warm_start_vector(stored, teleport, previous) if warm_start else None
+
+    result = pagerank_indexed(
+        n,
+        graph.edges.sources,
+        graph.edges.targets,
+        damping=settings.PAGERANK_DAMPING,
+        tol=settings.PAGERANK_TOLERANCE,
+        max_iter=settings.PAGERANK_MAX_ITERATIONS,
+        personalization=personalization,
+        start=start,
+    )
+    stored.ranks[teleport] = result.ranks
+    return {
+        "iterations": result.iterations,
+        "residual": result.residual,
+        "converged": result.converged,
+        "warm_start": start is not None,
+    }
+
+def _warm_start_vector(
+    stored: StoredGraph, teleport: tuple[str, ...], previous: StoredGraph | None
+) -> list[float] | None:
+    # Ranks for the same teleport set, from this graph or else an earlier crawl of
+    # the same seed (new URLs start at the uniform share). Plain ranks are a poor
+    # start for a personalized run, so they are not used as a fallback.
+    ranks = stored.ranks.get(teleport)
+    if ranks is not None:
+        return ranks
+    if previous is None or teleport not in previous.ranks:
+        return None
+    old_ranks = previous.ranks[teleport]
+    old_ids = previous.graph.urls
+    default = 1.0 / len(stored.graph.urls)
+    start = []
+    for u in stored.graph.urls:
+        j = old_ids.get(u)
+        start.append(old_ranks[j] if j is not None else default)
+    return start
+
+def _graph_payload(graph: CrawlGraph):
+    store = get_graph_store()
+    previous = store.latest_for_seed(graph.seed)
+    stored = store.add(graph)
+    pr_info = rank_graph(stored, previous=previous)
+    pr = stored.ranks[()]
+
+    aliases: dict[int, list[str]] = {}
+    for node in graph.alias:
+        aliases.setdefault(graph.resolve(node), []).append(graph.urls.url(node))
 
     nodes = [
         {
-            "id": _url_id(u),
+            "id": str(i),
             "url": u,
             "domain": _domain(u),
-            "depth": int(depth_map.get(u, 0)),
-            "pagerank": float(pr.get(u, 0.0)),
+            "depth": graph.depth[i],
+            "pagerank": pr[i],
+            "aliases": aliases.get(i, []),
         }
-        for u in urls
-    ]
-
-    id_map = {n["url"]: n["id"] for n in nodes}
-    out_edges = [
-        {"source": id_map[s], "target": id_map[t]}
-        for (s, t) in edges
-        if s in id_map and t in id_map
+        for i, u in enumerate(graph.urls)
+        if i not in graph.alias
     ]
+    edges = [{"source": str(s), "target": str(t)} for s, t in graph.edges]
+
+    return graph.seed, nodes, edges, {"graph_id": stored.graph_id, "pagerank": pr_info}
+
+async def build_graph_response(
+    seed_url: str,
+    max_hops: int,
+    max_pages: int,
+    same_domain_only: bool,
+    stats: CrawlStats | None = None,
+):
+    stats = stats if stats is not None else CrawlStats()
+    graph = await crawl_link_graph(seed_url, max_hops, max_pages, same_domain_only, stats=stats)
+    seed, nodes, edges, info = await asyncio.to_thread(_graph_payload, graph)
+    return seed, nodes, edges, {**stats.as_dict(), **info}
+
+async def build_crawl_job_response(crawl_id: str, stats: CrawlStats | None = None):
+    stats = stats if stats is not None else CrawlStats()
+    graph = await run_crawl_job(crawl_id, stats=stats)
+    seed, nodes, edges, info = await asyncio.to_thread(_graph_payload, graph)
+    return seed, nodes, edges, {**stats.as_dict(), **info}
+
+def personalized_ranks(stored: StoredGraph, teleport: list[str], warm_start: bool = True):
+    # Teleport targets may be given as URLs or node ids; unknown ones raise KeyError.
+    urls = stored.graph.urls
+    chosen = set()
+    for t in teleport:
+        if t.isdigit() and int(t) < len(urls):
+            chosen.add(urls.url(int(t)))
+        elif t in urls:
+            chosen.add(t)
+        elif get_canonicalizer()(t) in urls:
+            chosen.add(get_canonicalizer()(t))
+        else:
+            raise KeyError(t)
+    key = tuple(sorted(chosen))
+    info = rank_graph(stored, key, warm_start=warm_start)
+    alias = stored.graph.alias
+    ranks = {str(i): r for i, r in enumerate(stored.ranks[key]) if i not in alias}
+    return ranks, info
+
+async def stream_graph(
+    seed_url: str,
+    max_hops: int,
+    max_pages: int,
+    same_domain_only: bool,
+    progress_interval: float = 1.0,
+) -> AsyncIterator[dict]:
+    # Yields "node"/"edge" frames as the crawl finds them, a "progress" frame every
+    # `progress_interval` seconds, then one "pagerank" frame with the final ranks.
+    # The crawl waits while STREAM_EVENT_BUFFER frames are queued for the client.
+    events: asyncio.Queue[dict] = asyncio.Queue(maxsize=STREAM_EVENT_BUFFER)
+    stats = CrawlStats()
+    crawl = asyncio.create_task(crawl_link_graph(
+        seed_url, max_hops, max_pages, same_domain_only,
+        stats=stats, on_event=events.put,
+    ))
+    last_progress = time.monotonic()
+    getter: asyncio.Future | None = None
+
+    try:
+        while not (crawl.done() and events.empty()):
+            if getter is None:
+                getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait(
+                {getter, crawl}, timeout=progress_interval, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in done:
+                yield getter.result()
+                getter = None
+            if time.monotonic() - last_progress >= progress_interval:
+                last_progress = time.monotonic()
+                yield {"type": "progress", **stats.as_dict()}
 
-    return seed, nodes, out_edges
\ No newline at end of file
+        try:
+            graph = crawl.result()
+        except Exception as e:
+            yield {"type": "error", "detail": str(e)}
+            return
+
+        seed, nodes, _, info = await asyncio.to_thread(_graph_payload, graph)
+        yield {"type": "progress", **stats.as_dict()}
+        yield {
+            "type": "pagerank",
+            "seed": seed,
+            "graph_id": info["graph_id"],
+            "ranks": {n["id"]: n["pagerank"] for n in nodes},
+            **info["pagerank"],
+        }
+    finally:
+        if getter is not None:
+            getter.cancel()
+        if not crawl.done():
+            crawl.cancel()
@@ -1,17 +1,237 @@
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
+import asyncio
+import time
 
-from .browser import create_driver
+from ..core.config import settings
+from .browser import RenderProfile, apply_render_profile, get_driver_pool, wait_for_render
+from .cache import RenderCache
+from .render_queue import get_render_queue
 
 
-def get_rendered_html(url: str):
-    driver = create_driver()
-    try:
+DEFAULT_RENDER_TIMEOUT = 10.0
+
+
+def _remaining(deadline: float | None) -> float:
+    if deadline is None:
+        return DEFAULT_RENDER_TIMEOUT
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Render deadline exceeded")
+    return remaining
+
+
+def default_render_profile(wait: str | None = None, wait_selector: str | None = None) -> RenderProfile:
+    return RenderProfile(
+        blocked_resource_types=tuple(settings.PREVIEW_BLOCKED_RESOURCE_TYPES),
+        blocked_url_patterns=tuple(settings.PREVIEW_BLOCKED_URL_PATTERNS),
+        wait=wait or settings.PREVIEW_WAIT_STRATEGY,
+        wait_selector=wait_selector,
+        network_idle_ms=settings.PREVIEW_NETWORK_IDLE_MS,
+    )
+
+
+def get_rendered_html(url: str, profile: RenderProfile | None = None, deadline: float | None = None):
+    profile = profile or default_render_profile()
+    with get_driver_pool().checkout(None if deadline is None else _remaining(deadline)) as driver:
+        apply_render_profile(driver, profile)
+        driver.set_page_load_timeout(_remaining(deadline))
         driver.get(url)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
+        wait_for_render(driver, profile, _remaining(deadline))
         return driver.page_source
-    finally:
-        driver.quit()
\ No newline at end of file
+
+
+_PICKER = """
+<style>
+    .__loom_tooltip {
+        position: fixed;
+        bottom: 8px;
+        left: 8px;
+        background: rgba(0,0,0,.82);
+        color: #fff;
+        font: 12px/1.4 monospace;
+        padding: 4px 8px;
+        border-radius: 4px;
+        z-index: 2147483647;
+        pointer-events: none;
+        max-width: 50vw;
+        overflow: hidden;
+        text-overflow: ellipsis;
+        white-space: nowrap;
+    }
+</style>
+<script>
+(function () {
+    let _prev = null;
+    let _prevOutline = "";
+
+    const tooltip = document.createElement("div");
+    tooltip.className = "__loom_tooltip";
+    tooltip.style.display = "none";
+    document.body.appendChild(tooltip);
+
+    function getCssSelector(el) {
+        if (!(el instanceof Element)) return "";
+        const path = [];
+        while (el && el.nodeType === Node.ELEMENT_NODE) {
+            let selector = el.nodeName.toLowerCase();
+            if (el.id) {
+                selector += "#" + CSS.escape(el.id);
+                path.unshift(selector);
+                break;
+            }
+            const cls = (el.getAttribute("class") || "")
+                .trim().split(/\\s+/).filter(Boolean);
+            if (cls.length) {
+                selector += "." + cls.map(CSS.escape).join(".");
+            }
+            let sib = el, nth = 1;
+            while ((sib = sib.previousElementSibling)) {
+                if (sib.nodeName === el.nodeName) nth++;
+            }
+            selector += ":nth-of-type(" + nth + ")";
+            path.unshift(selector);
+            el = el.parentNode;
+        }
+        return path.join(" > ");
+    }
+
+    function getXPath(el) {
+        if (el.id) return '//*[@id="' + el.id + '"]';
+        const parts = [];
+        while (el && el.nodeType === Node.ELEMENT_NODE) {
+            let idx = 1, sib = el.previousSibling;
+            while (sib) {
+                if (sib.nodeType === 1 && sib.nodeName === el.nodeName) idx++;
+                sib = sib.previousSibling;
+            }
+            parts.unshift(el.nodeName.toLowerCase() + "[" + idx + "]");
+            el = el.parentNode;
+        }
+        return "/" + parts.join("/");
+    }
+
+    function getAttributes(el) {
+        const attrs = {};
+        for (const a of el.attributes) attrs[a.name] = a.value;
+        return attrs;
+    }
+
+    function shortSelector(el) {
+        const tag = el.tagName.toLowerCase();
+        if (el.id) return tag + "#" + el.id;
+        const cls = (el.getAttribute("class") || "")
+            .trim().split(/\\s+/).filter(Boolean);
+        if (cls.length) return tag + "." + cls.join(".");
+        return tag;
+    }
+
+    document.addEventListener("mouseover", function (e) {
+        const t = e.target;
+        if (t === tooltip) return;
+        if (_prev && _prev !== t) _prev.style.outline = _prevOutline;
+        _prevOutline = t.style.outline;
+        t.style.outline = "2px solid #e74c3c";
+        _prev = t;
+        tooltip.textContent = shortSelector(t);
+        tooltip.style.display = "block";
+    }, true);
+
+    document.addEventListener("mouseout", function (e) {
+        const t = e.target;
+        if (t === tooltip) return;
+        t.style.outline = _prevOutline;
+        _prev = null;
+        tooltip.style.display = "none";
+    }, true);
+
+    document.addEventListener("click", function (e) {
+        e.preventDefault();
+        e.stopPropagation();
+        e.stopImmediatePropagation();
+
+        const el = e.target;
+        const text = (el.textContent || "").trim();
+
+        window.parent.postMessage({
+            type: "ELEMENT_SELECTED",
+            tag: el.tagName.toLowerCase(),
+            selector: shortSelector(el),
+            cssSelector: getCssSelector(el),
+            xpath: getXPath(el),
+            attributes: getAttributes(el),
+            textContent: text.length > 200 ? text.slice(0, 200) : text,
+            innerHtml: el.innerHTML.length > 500 ? el.innerHTML.slice(0, 500) : el.innerHTML
+        }, "*");
+    }, true);
+})();
+</script>
+"""
+
+
+_cache = RenderCache(
+    max_entries=settings.PREVIEW_CACHE_MAX_ENTRIES,
+    max_bytes=settings.PREVIEW_CACHE_MAX_BYTES,
+    ttl=settings.PREVIEW_CACHE_TTL,
+)
+
+
+def inject_picker(html: str, url: str) -> str:
+    html = html.replace("<head>", f'<head><base href="{url}">')
+    html = html.replace("</body>", _PICKER + "</body>")
+    return html
+
+
+def get_cached_rendered_html(
+    url: str, profile: RenderProfile | None = None, deadline: float | None = None
+) -> str:
+    profile = profile or default_render_profile()
+    return _cache.get_or_compute(
+        ("rendered", url, profile),
+        lambda: get_rendered_html(url, profile, deadline),
+    )
+
+
+def get_preview_html(
+    url: str, profile: RenderProfile | None = None, deadline: float | None = None
+) -> str:
+    profile = profile or default_render_profile()
+    return _cache.get_or_compute(
+        ("preview", url, profile),
+        lambda: inject_picker(get_cached_rendered_html(url, profile, deadline), url),
+    )
+
+
+def peek_preview_html(url: str, profile: RenderProfile | None = None) -> str | None:
+    return _cache.get(("preview", url, profile or default_render_profile()))
+
+
+# Renders in flight on the event loop, by (url, profile). Requests for a page that
+# is already being rendered wait for that render instead of taking a render queue
+# slot of their own; the render runs as its own task, so it outlives a caller
+# that disconnects.
+_inflight: dict[tuple[str, RenderProfile], asyncio.Task] = {}
+_coalesced = 0
+
+
+async def render_preview_html(url: str, profile: RenderProfile, timeout: float) -> str:
+    global _coalesced
+    key = (url, profile)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(get_render_queue().run(get_preview_html, url, profile, timeout=timeout))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _render_done(key, t))
+    else:
+        _coalesced += 1
+    return await asyncio.shield(task)
+
+
+def _render_done(key: tuple[str, RenderProfile], task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        # Retrieved here so a render nobody waits for any more is not reported as unhandled.
+        task.exception()
+
+
+def preview_cache_stats() -> dict:
+    return {**_cache.stats(), "renders_in_flight": len(_inflight), "requests_coalesced": _coalesced}
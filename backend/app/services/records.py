@@ -0,0 +1,20 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def group_records(
+    items: Iterable[Tuple[Optional[str], Optional[int], Optional[str]]],
+) -> List[Dict[str, Optional[str]]]:
+    # (selector_name, row_index, text) triples -> one dict per row, keyed by selector name.
+    names: List[str] = []
+    rows: Dict[int, Dict[str, Optional[str]]] = {}
+    for name, row_index, text in items:
+        if name is None or row_index is None:
+            continue
+        if name not in names:
+            names.append(name)
+        rows.setdefault(row_index, {})[name] = (text or "").strip()
+
+    return [
+        {name: rows[i].get(name) for name in names}
+        for i in sorted(rows)
+    ]
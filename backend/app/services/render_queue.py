@@ -0,0 +1,104 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from ..core.config import settings
+
+
+class RenderQueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Render queue is full")
+        self.retry_after = retry_after
+
+
+class RenderTimeout(Exception):
+    pass
+
+
+# Dedicated executor for Selenium renders so they never occupy Starlette's shared
+# threadpool. At most `workers` renders run and `max_queue` wait; anything beyond
+# that is rejected immediately so the caller can send back Retry-After.
+class RenderQueue:
+    def __init__(self, workers: int, max_queue: int):
+        self._workers = max(1, workers)
+        self._capacity = self._workers + max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="render")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._avg_seconds = 5.0
+
+    async def run(self, fn: Callable, *args, timeout: float):
+        with self._lock:
+            if self._pending >= self._capacity:
+                raise RenderQueueFull(self._retry_after_locked())
+            self._pending += 1
+
+        deadline = time.monotonic() + timeout
+        try:
+            fut = self._executor.submit(self._timed, fn, *args, deadline=deadline)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        fut.add_done_callback(self._on_done)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), timeout)
+        except asyncio.TimeoutError:
+            fut.cancel()
+            raise RenderTimeout(f"Render did not finish within {timeout:g}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "capacity": self._capacity,
+                "pending": self._pending,
+                "avg_render_seconds": round(self._avg_seconds, 3),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _timed(self, fn: Callable, *args, deadline: float):
+        if time.monotonic() >= deadline:
+            raise RenderTimeout("Render deadline passed while queued")
+        started = time.monotonic()
+        try:
+            return fn(*args, deadline=deadline)
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def _on_done(self, _fut: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _retry_after_locked(self) -> int:
+        waves = self._pending / self._workers
+        return max(1, math.ceil(self._avg_seconds * waves))
+
+
+_queue: RenderQueue | None = None
+_queue_lock = threading.Lock()
+
+def get_render_queue() -> RenderQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = RenderQueue(
+                workers=settings.PREVIEW_RENDER_WORKERS or settings.BROWSER_POOL_SIZE,
+                max_queue=settings.PREVIEW_RENDER_QUEUE_SIZE,
+            )
+        return _queue
+
+def close_render_queue() -> None:
+    global _queue
+    with _queue_lock:
+        q, _queue = _queue, None
+    if q is not None:
+        q.shutdown()
@@ -1,7 +1,89 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException
+
+from ..core.config import settings
+from .browser import RenderProfile, apply_render_profile, get_driver_pool, wait_for_render
+from .html_parser import get_engine
+from .http_client import afetch, fetch
+from .records import group_records
+
+SCRAPE_MODES = ("static", "dynamic")
+
+# Runs in the page: one round trip returns the rendered document plus tag, text
+# and attributes for every match. Arguments: [[name, selector], ...], container.
+# Text follows the static engines (see html_parser): script, style and template
+# content is left out of an ancestor's text and whitespace-only strings collapse.
+_EXTRACT_JS = """
+const [fields, container] = arguments;
+const OPAQUE = new Set(["script", "style", "template"]);
+const PRESERVE = new Set(["pre", "textarea"]);
+const collapse = (s, preserve) =>
+    preserve || /[^ \\n\\t\\f\\r]/.test(s) ? s : s.includes("\\n") ? "\\n" : " ";
+const textOf = (root) => {
+    if (OPAQUE.has(root.localName)) return root.textContent || "";
+    const parts = [];
+    const walk = (node, preserve) => {
+        for (const child of node.childNodes) {
+            if (child.nodeType === Node.TEXT_NODE) {
+                parts.push(collapse(child.data, preserve));
+            } else if (child.nodeType === Node.ELEMENT_NODE && !OPAQUE.has(child.localName)) {
+                walk(child, preserve || PRESERVE.has(child.localName));
+            }
+        }
+    };
+    walk(root, root.closest("pre, textarea") !== null);
+    return parts.join("");
+};
+const pack = (el, name, row) => ({
+    tag: el.tagName.toLowerCase(),
+    text: textOf(el),
+    attributes: Object.fromEntries(Array.from(el.attributes, (a) => [a.name, a.value])),
+    name: name,
+    row: row,
+});
+const elements = [];
+if (container) {
+    document.querySelectorAll(container).forEach((rowEl, row) => {
+        for (const [name, sel] of fields) {
+            const el = rowEl.querySelector(sel);
+            if (el) elements.push(pack(el, name, row));
+        }
+    });
+} else {
+    for (const [name, sel] of fields) {
+        document.querySelectorAll(sel).forEach((el, row) => elements.push(pack(el, name, row)));
+    }
+}
+return { html: document.documentElement.outerHTML, elements: elements };
+"""
+
+
+@dataclass
+class ScrapeResult:
+    url: str
+    final_url: str
+    body: str
+    status_code: Optional[int]
+    headers: Dict[str, str]
+    elapsed: float
+    elements: List[Dict] = field(default_factory=list)
+    records: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class ScrapeJob:
+    url: str
+    selector: Optional[str] = None
+    mode: Optional[str] = "static"
+    fields: Optional[Dict[str, str]] = None
+    container: Optional[str] = None
 
 def detect_value(value: str): 
     value = value.strip()
@@ -20,23 +102,225 @@ def detect_value(value: str):
         pass
     return "text", None, None
 
-def scrape_static(url: str, selector: str) -> List[Dict]: 
-    response = requests.get(url)
-    response.raise_for_status()
+def _element_result(
+    tag_name: str,
+    text: str,
+    attributes: Dict[str, str],
+    selector_name: Optional[str] = None,
+    row_index: Optional[int] = None,
+) -> Dict:
+    detected_type, numeric_value, date_value = detect_value(text)
+    return {
+        "tag_name": tag_name,
+        "text_content": text,
+        "attributes": attributes,
+        "selector_name": selector_name,
+        "row_index": row_index,
+        "detected_type": detected_type,
+        "numeric_value": numeric_value,
+        "date_value": date_value
+    }
+
+def _field_pairs(
+    selector: Optional[str], fields: Optional[Dict[str, str]]
+) -> List[tuple[Optional[str], str]]:
+    if fields:
+        return list(fields.items())
+    if selector:
+        return [(None, selector)]
+    raise ValueError("A selector or a map of named selectors is required")
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    elements = soup.select(selector)
+def extract_elements(
+    html: str,
+    selector: Optional[str] = None,
+    fields: Optional[Dict[str, str]] = None,
+    container: Optional[str] = None,
+    engine: Optional[str] = None,
+) -> List[Dict]:
+    # One parse serves every selector. With a container, each container match is a
+    # row and every named selector is resolved inside it; without one, the n-th
+    # match of each selector forms row n.
+    parser = get_engine(engine)
+    doc = parser.parse(html)
+    pairs = _field_pairs(selector, fields)
+
+    def element(node, name: Optional[str], row_index: int) -> Dict:
+        return _element_result(
+            parser.tag(node), parser.text(node), parser.attributes(node), name, row_index
+        )
 
     result = []
 
-    for el in elements:
-        detected_type, numeric_value, date_value = detect_value(el.get_text())
-        result.append({
-            "tag_name": el.name,
-            "text_content": el.get_text(),
-            "detected_type": detected_type,
-            "numeric_value": numeric_value,
-            "date_value": date_value
-        })
-    
-    return result
\ No newline at end of file
+    if container:
+        for row_index, row in enumerate(parser.select(doc, container)):
+            for name, sel in pairs:
+                node = parser.select_one(row, sel)
+                if node is not None:
+                    result.append(element(node, name, row_index))
+    else:
+        for name, sel in pairs:
+            for row_index, node in enumerate(parser.select(doc, sel)):
+                result.append(element(node, name, row_index))
+
+    return result
+
+def build_records(elements: List[Dict]) -> List[Dict[str, Optional[str]]]:
+    return group_records(
+        (item.get("selector_name"), item.get("row_index"), item.get("text_content"))
+        for item in elements
+    )
+
+def scrape_static(
+    url: str,
+    selector: Optional[str] = None,
+    fields: Optional[Dict[str, str]] = None,
+    container: Optional[str] = None,
+) -> ScrapeResult:
+    started = time.perf_counter()
+    response = fetch(url)
+    response.raise_for_status()
+
+    body = response.text
+    elements = extract_elements(body, selector, fields, container)
+    return ScrapeResult(
+        url=url,
+        final_url=str(response.url),
+        body=body,
+        status_code=response.status_code,
+        headers=dict(response.headers),
+        elapsed=time.perf_counter() - started,
+        elements=elements,
+        records=build_records(elements),
+    )
+
+def scrape_dynamic(
+    url: str,
+    selector: Optional[str] = None,
+    fields: Optional[Dict[str, str]] = None,
+    container: Optional[str] = None,
+) -> ScrapeResult:
+    pairs = _field_pairs(selector, fields)
+    profile = RenderProfile(
+        blocked_resource_types=("image", "font", "media", "tracking"),
+        wait="selector",
+        wait_selector=container or pairs[0][1],
+    )
+    timeout = settings.DYNAMIC_SCRAPE_TIMEOUT
+    started = time.perf_counter()
+
+    with get_driver_pool().checkout() as driver:
+        apply_render_profile(driver, profile)
+        driver.set_page_load_timeout(timeout)
+        driver.get(url)
+        try:
+            wait_for_render(driver, profile, timeout)
+        except TimeoutException:
+            # Nothing matched in time; query anyway so the caller gets an empty result.
+            pass
+        extracted = driver.execute_script(_EXTRACT_JS, [list(p) for p in pairs], container)
+        final_url = driver.current_url
+
+    elements = [
+        _element_result(m["tag"], m["text"], m.get("attributes") or {}, m.get("name"), m.get("row"))
+        for m in extracted["elements"]
+    ]
+    return ScrapeResult(
+        url=url,
+        final_url=final_url,
+        body=extracted["html"],
+        # WebDriver does not expose the document's HTTP status or headers.
+        status_code=None,
+        headers={},
+        elapsed=time.perf_counter() - started,
+        elements=elements,
+        records=build_records(elements),
+    )
+
+def scrape_page(
+    url: str,
+    selector: Optional[str] = None,
+    mode: Optional[str] = "static",
+    fields: Optional[Dict[str, str]] = None,
+    container: Optional[str] = None,
+) -> ScrapeResult:
+    mode = mode or "static"
+    if mode == "static":
+        return scrape_static(url, selector, fields, container)
+    if mode == "dynamic":
+        return scrape_dynamic(url, selector, fields, container)
+    raise ValueError(f"Unknown scrape mode: {mode}")
+
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=settings.SCRAPE_PARSE_WORKERS)
+        return _parse_pool
+
+def close_parse_pool() -> None:
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+async def _scrape_static_async(job: ScrapeJob) -> ScrapeResult:
+    started = time.perf_counter()
+    response = await afetch(job.url)
+    response.raise_for_status()
+
+    body = response.text
+    elapsed = time.perf_counter() - started
+    loop = asyncio.get_running_loop()
+    elements = await loop.run_in_executor(
+        _get_parse_pool(), extract_elements, body, job.selector, job.fields, job.container
+    )
+
+    return ScrapeResult(
+        url=job.url,
+        final_url=str(response.url),
+        body=body,
+        status_code=response.status_code,
+        headers=dict(response.headers),
+        elapsed=elapsed,
+        elements=elements,
+        records=build_records(elements),
+    )
+
+async def scrape_batch(
+    jobs: List[ScrapeJob],
+    concurrency: int,
+    on_done: Optional[Callable[[ScrapeResult | Exception], None]] = None,
+) -> List[ScrapeResult | Exception]:
+    # Fetches run concurrently on the shared async client, parsing happens in a process
+    # pool, and a failing job is returned as its exception instead of aborting the batch.
+    # `on_done` is called with each outcome as it finishes.
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def scrape_one(job: ScrapeJob) -> ScrapeResult:
+        mode = job.mode or "static"
+        if mode == "static":
+            return await _scrape_static_async(job)
+        if mode == "dynamic":
+            return await asyncio.to_thread(
+                scrape_dynamic, job.url, job.selector, job.fields, job.container
+            )
+        raise ValueError(f"Unknown scrape mode: {mode}")
+
+    async def run(job: ScrapeJob) -> ScrapeResult:
+        async with sem:
+            try:
+                result = await scrape_one(job)
+            except Exception as e:
+                if on_done is not None:
+                    on_done(e)
+                raise
+            if on_done is not None:
+                on_done(result)
+            return result
+
+    return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
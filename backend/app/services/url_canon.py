@@ -0,0 +1,98 @@
+import re
+import string
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Iterable
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from ..core.config import settings
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_UNRESERVED = frozenset(string.ascii_letters + string.digits + "-._~")
+_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_INDEX_PAGES = ("index.html", "index.htm")
+
+
+def _normalize_escapes(s: str) -> str:
+    # Decode escapes of unreserved characters (always safe) and uppercase the rest.
+    def repl(m: re.Match) -> str:
+        ch = chr(int(m.group(1), 16))
+        return ch if ch in _UNRESERVED else "%" + m.group(1).upper()
+
+    return _ESCAPE.sub(repl, s) if "%" in s else s
+
+
+def _remove_dot_segments(path: str) -> str:
+    if "." not in path:
+        return path
+    out: list[str] = []
+    segments = path.split("/")
+    for seg in segments:
+        if seg == ".":
+            continue
+        if seg == "..":
+            if len(out) > 1:
+                out.pop()
+            continue
+        out.append(seg)
+    if segments[-1] in (".", ".."):
+        out.append("")
+    return "/".join(out)
+
+
+# Rewrites equivalent spellings of a URL to one form: lowercase scheme and host,
+# no default port, unreserved characters unescaped, dot segments resolved, no
+# fragment or trailing slash, tracking parameters removed and the rest sorted by name.
+# `strip_params` entries may use shell wildcards ("utm_*").
+class UrlCanonicalizer:
+    def __init__(self, strip_params: Iterable[str] = (), collapse_index: bool = False):
+        names = [p.lower() for p in strip_params]
+        self._strip_names = frozenset(n for n in names if not any(c in n for c in "*?["))
+        self._strip_patterns = tuple(n for n in names if n not in self._strip_names)
+        self.collapse_index = collapse_index
+
+    def __call__(self, url: str) -> str:
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            # Malformed host or port: only drop the fragment.
+            return url.split("#", 1)[0]
+
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").rstrip(".")
+        if ":" in host:
+            host = f"[{host}]"
+        if port is not None and port != _DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        userinfo, at, _ = parts.netloc.rpartition("@")
+        netloc = f"{userinfo}{at}{host}"
+
+        path = _remove_dot_segments(_normalize_escapes(parts.path))
+        if self.collapse_index:
+            head, _, last = path.rpartition("/")
+            if last.lower() in _INDEX_PAGES:
+                path = head
+        path = path.rstrip("/")
+
+        return urlunsplit((scheme, netloc, path, self._query(parts.query), ""))
+
+    def _query(self, query: str) -> str:
+        if not query:
+            return ""
+        kept = []
+        for pair in query.split("&"):
+            if not pair:
+                continue
+            name = unquote_plus(pair.split("=", 1)[0]).lower()
+            if name in self._strip_names or any(fnmatchcase(name, p) for p in self._strip_patterns):
+                continue
+            kept.append(_normalize_escapes(pair))
+        # Stable sort on the name keeps the order of repeated parameters.
+        kept.sort(key=lambda pair: pair.split("=", 1)[0])
+        return "&".join(kept)
+
+
+@lru_cache(maxsize=1)
+def get_canonicalizer() -> UrlCanonicalizer:
+    return UrlCanonicalizer(settings.CRAWL_STRIP_QUERY_PARAMS, settings.CRAWL_COLLAPSE_INDEX)
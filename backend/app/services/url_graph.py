@@ -0,0 +1,214 @@
+import hashlib
+import math
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from ..core.config import settings
+
+DEDUP_MODES = ("exact", "fingerprint")
+# Fixed blake2b key: fingerprints, and so any collisions, are the same in every
+# process and run, unlike hash(), which is randomized per process.
+_FINGERPRINT_KEY = b"loom-url-fingerprint"
+
+
+def url_fingerprint(url: str) -> int:
+    # 64-bit keyed blake2b of the URL.
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=8, key=_FINGERPRINT_KEY).digest()
+    return int.from_bytes(digest, "little")
+
+
+# Maps URLs to dense ids 0..n-1 in first-seen order.
+class UrlInterner:
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._urls: list[str] = []
+        self._str_bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self._ids) + sys.getsizeof(self._urls) + self._str_bytes
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._urls)
+
+    def get(self, url: str) -> int | None:
+        return self._ids.get(url)
+
+    def url(self, node: int) -> str:
+        return self._urls[node]
+
+    def intern(self, url: str) -> tuple[int, bool]:
+        # Returns (id, is_new).
+        node = self._ids.get(url)
+        if node is not None:
+            return node, False
+        node = len(self._urls)
+        self._ids[url] = node
+        self._urls.append(url)
+        self._str_bytes += sys.getsizeof(url)
+        return node, True
+
+
+def fingerprint_bits(capacity: int, fp_rate: float) -> int:
+    # With n fingerprints stored, a new URL collides with one of them with
+    # probability ~ n / 2**bits; size the fingerprint for `capacity` URLs.
+    if not 0 < fp_rate < 1:
+        raise ValueError("fp_rate must be between 0 and 1")
+    return min(64, max(16, math.ceil(math.log2(max(1, capacity) / fp_rate))))
+
+
+# Same interface as UrlInterner with predictable memory: URLs are packed into one
+# UTF-8 buffer and found through an open-addressing table of fixed-width hash
+# fingerprints, so no per-URL Python objects are kept. A URL whose fingerprint
+# collides with an earlier one is taken for that URL (see fingerprint_bits).
+# The saving is partial: the URL bytes are still stored so url() can return them,
+# and only the dict and per-string overhead go (about 95 instead of 150 bytes per
+# 50-character URL). URLs waiting in a crawl's queue are plain strings either way.
+class FingerprintInterner:
+    def __init__(self, capacity: int, fp_rate: float):
+        self.bits = fingerprint_bits(capacity, fp_rate)
+        self._mask = (1 << self.bits) - 1
+        self._typecode = "I" if self.bits <= 32 else "Q"
+        self._blob = bytearray()
+        self._offsets = array("I", [0])
+        self._alloc(16)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(sys.getsizeof(x) for x in (self._keys, self._ids, self._blob, self._offsets))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __contains__(self, url: str) -> bool:
+        return self.get(url) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.url(i) for i in range(len(self)))
+
+    def get(self, url: str) -> int | None:
+        fp = self._fingerprint(url)
+        slot = self._slot(fp)
+        return self._ids[slot] if self._keys[slot] == fp else None
+
+    def url(self, node: int) -> str:
+        return self._blob[self._offsets[node]:self._offsets[node + 1]].decode("utf-8")
+
+    def intern(self, url: str) -> tuple[int, bool]:
+        fp = self._fingerprint(url)
+        slot = self._slot(fp)
+        if self._keys[slot] == fp:
+            return self._ids[slot], False
+
+        node = len(self)
+        self._keys[slot] = fp
+        self._ids[slot] = node
+        self._blob += url.encode("utf-8")
+        self._offsets.append(len(self._blob))
+        # Keep the table at most half full so probe chains stay short.
+        if 2 * len(self) > len(self._keys):
+            self._grow()
+        return node, True
+
+    def _fingerprint(self, url: str) -> int:
+        # 0 marks an empty slot.
+        return (url_fingerprint(url) & self._mask) or 1
+
+    def _slot(self, fp: int) -> int:
+        size_mask = len(self._keys) - 1
+        slot = fp & size_mask
+        keys = self._keys
+        while keys[slot] and keys[slot] != fp:
+            slot = (slot + 1) & size_mask
+        return slot
+
+    def _alloc(self, size: int) -> None:
+        self._keys = array(self._typecode, bytes(size * array(self._typecode).itemsize))
+        self._ids = array("I", bytes(size * 4))
+
+    def _grow(self) -> None:
+        keys, ids = self._keys, self._ids
+        self._alloc(2 * len(keys))
+        for fp, node in zip(keys, ids):
+            if fp:
+                slot = self._slot(fp)
+                self._keys[slot] = fp
+                self._ids[slot] = node
+
+
+def new_url_interner(capacity: int) -> UrlInterner | FingerprintInterner:
+    mode = settings.CRAWL_DEDUP.lower()
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown CRAWL_DEDUP mode: {mode}")
+    if mode == "fingerprint":
+        return FingerprintInterner(capacity, settings.CRAWL_DEDUP_FP_RATE)
+    return UrlInterner()
+
+
+# Edge list as two parallel uint32 columns (8 bytes per edge).
+class EdgeColumns:
+    def __init__(self):
+        self.sources = array("I")
+        self.targets = array("I")
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return zip(self.sources, self.targets)
+
+    def append(self, source: int, target: int) -> None:
+        self.sources.append(source)
+        self.targets.append(target)
+
+
+# Result of a crawl. Node 0 is the seed; `depth[i]` is the hop distance of node i.
+# `alias` maps pages found to duplicate another page's content to that page.
+@dataclass
+class CrawlGraph:
+    urls: UrlInterner | FingerprintInterner = field(default_factory=UrlInterner)
+    depth: array = field(default_factory=lambda: array("B"))
+    edges: EdgeColumns = field(default_factory=EdgeColumns)
+    alias: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def seed(self) -> str:
+        return self.urls.url(0)
+
+    def add_node(self, url: str, depth: int) -> tuple[int, bool]:
+        node, new = self.urls.intern(url)
+        if new:
+            self.depth.append(depth)
+        return node, new
+
+    def resolve(self, node: int) -> int:
+        while node in self.alias:
+            node = self.alias[node]
+        return node
+
+    def collapse_aliases(self) -> None:
+        # Points edges at canonical nodes and drops the self-loops and duplicate
+        # edges that creates. Aliased pages are never expanded, so they have no
+        # out-edges, and each page's out-edges are contiguous.
+        if not self.alias:
+            return
+        edges = EdgeColumns()
+        current, seen = None, set()
+        for source, target in self.edges:
+            if source != current:
+                current, seen = source, set()
+            resolved = self.resolve(target)
+            if resolved != target and resolved == source:
+                continue
+            if resolved not in seen:
+                seen.add(resolved)
+                edges.append(source, resolved)
+        self.edges = edges
@@ -0,0 +1,49 @@
+# Times extract_elements and link extraction per HTML engine on a synthetic
+# product listing. Run from backend/: python benchmarks/bench_html_parser.py [items]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from app.services.html_parser import available_engines, get_engine  # noqa: E402
+from app.services.scraper import extract_elements  # noqa: E402
+
+ROUNDS = 5
+
+
+def make_page(items: int) -> str:
+    rows = "".join(
+        f'<li class="product" data-id="{i}"><h2><a href="/p/{i}">Item {i}</a></h2>'
+        f'<span class="price">{i}.99</span><p class="desc">Some <b>bold</b> text {i}</p>'
+        f'<button class="buy" disabled>Buy</button><script>track({i})</script></li>'
+        for i in range(items)
+    )
+    return f"<html><head><title>Shop</title></head><body><ul>{rows}</ul></body></html>"
+
+
+def best_of(fn) -> float:
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    html = make_page(items)
+    fields = {"name": "h2 a", "price": ".price", "desc": ".desc"}
+    print(f"{items} items, {len(html) / 1024:.0f} KiB, best of {ROUNDS}")
+    print(f"{'engine':<12}{'extract':>10}{'links':>10}")
+    for name in available_engines():
+        engine = get_engine(name)
+        extract = best_of(lambda: extract_elements(html, fields=fields, container=".product", engine=name))
+        links = best_of(lambda: engine.links(html))
+        print(f"{name:<12}{extract * 1000:>8.1f}ms{links * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Times pagerank_indexed with numpy/scipy against the pure-Python fallback on random
+# graphs, a warm-started rerun, and the dict-loop pagerank it replaced (30 fixed
+# iterations; rank on dangling pages was dropped, so scores differ slightly).
+# Run from backend/: python benchmarks/bench_pagerank.py
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import pagerank  # noqa: E402
+
+SIZES = ((300, 2_000), (3_000, 20_000), (20_000, 200_000), (100_000, 1_000_000))
+# The dict loop takes minutes past this
+REFERENCE_MAX_EDGES = 200_000
+
+
+def reference_pagerank(urls, edges, damping=0.85, iters=30):
+    # The original implementation, unchanged.
+    outlinks = defaultdict(list)
+    inlinks = defaultdict(list)
+
+    for s, t in edges:
+        outlinks[s].append(t)
+        inlinks[t].append(s)
+
+    n = len(urls)
+    if n == 0:
+        return {}
+
+    pr = {u: 1.0 / n for u in urls}
+
+    for _ in range(iters):
+        new_pr = {}
+        base = (1.0 - damping) / n
+        for u in urls:
+            rank_sum = 0.0
+            for v in inlinks.get(u, []):
+                outdeg = len(outlinks.get(v, []))
+                if outdeg:
+                    rank_sum += pr[v] / outdeg
+            new_pr[u] = base + damping * rank_sum
+        pr = new_pr
+
+    s = sum(pr.values()) or 1.0
+    for u in pr:
+        pr[u] /= s
+    return pr
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    if pagerank.np is None:
+        sys.exit("numpy and scipy are required for this benchmark")
+    random.seed(0)
+    print(
+        f"{'nodes':>8}{'edges':>10}{'numpy':>10}{'python':>10}{'warm':>10}{'iters':>7}{'max diff':>10}"
+        f"{'dict loop':>11}{'speedup':>9}{'vs dict':>10}"
+    )
+    for n, e in SIZES:
+        # Targets skew to the first half of the ids so that some nodes are dangling.
+        edges = list({(random.randrange(n), random.randrange(n // 2)) for _ in range(e)})
+        sources = [s for s, _ in edges]
+        targets = [t for _, t in edges]
+
+        fast, t_fast = timed(lambda: pagerank.pagerank_indexed(n, sources, targets))
+        warm, t_warm = timed(lambda: pagerank.pagerank_indexed(n, sources, targets, start=fast.ranks))
+        np_module, pagerank.np = pagerank.np, None
+        try:
+            slow, t_slow = timed(lambda: pagerank.pagerank_indexed(n, sources, targets))
+        finally:
+            pagerank.np = np_module
+        diff = max(abs(a - b) for a, b in zip(fast.ranks, slow.ranks))
+        reference = f"{'skipped':>11}"
+        if len(edges) <= REFERENCE_MAX_EDGES:
+            ref, t_ref = timed(lambda: reference_pagerank(range(n), edges))
+            ref_diff = max(abs(fast.ranks[i] - ref[i]) for i in range(n))
+            reference = f"{t_ref * 1000:>9.0f}ms{t_ref / t_fast:>8.0f}x{ref_diff:>10.1e}"
+        print(
+            f"{n:>8}{len(edges):>10}{t_fast * 1000:>8.1f}ms{t_slow * 1000:>8.0f}ms"
+            f"{t_warm * 1000:>8.1f}ms{fast.iterations:>4}/{warm.iterations:<2}{diff:>10.1e}{reference}"
+        )
+
+
+if __name__ == "__main__":
+    main()
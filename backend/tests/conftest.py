@@ -0,0 +1,4 @@
+import os
+
+# Settings require a database URL at import time; nothing in the tests connects to it.
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
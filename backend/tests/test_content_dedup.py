@@ -0,0 +1,128 @@
+import asyncio
+import random
+
+import pytest
+
+from app.core.config import settings
+from app.services.content_fingerprint import MIN_WORDS, ContentIndex, page_simhash
+from app.services.link_graph import CrawlStats, _Fetched, _parse_page
+from app.services.url_graph import CrawlGraph
+
+
+def flip(h: int, bits) -> int:
+    for bit in bits:
+        h ^= 1 << bit
+    return h
+
+
+def page(words: list[str]) -> str:
+    return "<html><body><p>" + " ".join(words) + "</p><script>ignored()</script></body></html>"
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 3, 5, 15])
+def test_bands_cover_all_64_bits(max_distance):
+    index = ContentIndex(max_distance)
+    assert len(index._bands) == max_distance + 1
+    covered = [bit for shift, width in index._bands for bit in range(shift, shift + width)]
+    assert covered == list(range(64))
+
+
+@pytest.mark.parametrize("max_distance", [1, 3, 5])
+def test_near_finds_every_hash_within_distance(max_distance):
+    rng = random.Random(max_distance)
+    for _ in range(200):
+        index = ContentIndex(max_distance)
+        h = rng.getrandbits(64)
+        index.add_near(h, 7)
+        bits = rng.sample(range(64), rng.randint(0, max_distance))
+        assert index.near(flip(h, bits)) == 7
+        # One bit more than allowed never matches, even when a band agrees.
+        bits = rng.sample(range(64), max_distance + 1)
+        assert index.near(flip(h, bits)) is None
+
+
+def test_near_returns_first_node_registered():
+    index = ContentIndex(3)
+    index.add_near(0b1011, 1)
+    index.add_near(0b1010, 2)
+    assert index.near(0b1000) == 1
+
+
+def test_exact_registers_first_node():
+    index = ContentIndex()
+    assert index.exact(b"digest", 4) is None
+    assert index.exact(b"digest", 4) is None
+    assert index.exact(b"digest", 9) == 4
+
+
+def test_page_simhash_near_and_far():
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(500)]
+    words = [rng.choice(vocabulary) for _ in range(400)]
+    edited = list(words)
+    edited[200] = "changed"
+    other = [rng.choice(vocabulary) for _ in range(400)]
+
+    base = page_simhash(page(words))
+    assert (base ^ page_simhash(page(edited))).bit_count() <= 3
+    assert (base ^ page_simhash(page(other))).bit_count() > 3
+    assert page_simhash(page(words[:MIN_WORDS - 1])) is None
+
+
+def test_truncated_pages_skip_near_matching(monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_PARSE_WORKERS", 0)
+    rng = random.Random(1)
+    words = [f"w{rng.randrange(500)}" for _ in range(400)]
+    edited, edited_again = list(words), list(words)
+    edited[100] = "changed"
+    edited_again[300] = "changed"
+    index, stats = ContentIndex(3), CrawlStats()
+
+    async def check(node, words, truncated):
+        fetched = _Fetched(status=200, body=page(words).encode(), truncated=truncated)
+        return await _parse_page(f"https://example.com/{node}", node, fetched, index, stats)
+
+    assert asyncio.run(check(0, words, truncated=False))[1] is None
+    assert asyncio.run(check(1, edited, truncated=True))[1] is None
+    assert asyncio.run(check(2, edited_again, truncated=False))[1:] == (0, False)
+    # A truncated copy is still matched byte for byte.
+    assert asyncio.run(check(3, words, truncated=True))[1:] == (0, True)
+
+
+def graph_with(edges, alias, n=5):
+    graph = CrawlGraph()
+    for i in range(n):
+        graph.add_node(f"https://example.com/{i}", 1 if i else 0)
+    for source, target in edges:
+        graph.edges.append(source, target)
+    graph.alias.update(alias)
+    return graph
+
+
+def test_collapse_redirects_edges_to_original():
+    # 3 is an exact copy of 1, 4 a near copy of 3 (so of 1 as well).
+    graph = graph_with([(0, 1), (0, 2), (0, 3), (0, 4), (2, 3), (2, 0)], {3: 1, 4: 3})
+    graph.collapse_aliases()
+    assert list(graph.edges) == [(0, 1), (0, 2), (2, 1), (2, 0)]
+    assert graph.resolve(4) == 1
+
+
+def test_collapse_drops_self_loops_through_aliases_only():
+    graph = graph_with([(1, 1), (1, 2), (1, 3)], {3: 1})
+    graph.collapse_aliases()
+    # The page's own self-link stays; the one created by the alias is dropped.
+    assert list(graph.edges) == [(1, 1), (1, 2)]
+
+
+def test_collapse_without_aliases_keeps_edges():
+    graph = graph_with([(0, 1), (0, 1)], {})
+    graph.collapse_aliases()
+    assert list(graph.edges) == [(0, 1), (0, 1)]
+
+
+def test_collapse_dedupes_only_within_contiguous_runs():
+    # Duplicates are only removed within one run of a source's edges. Crawls add
+    # each page's links in one go, so every source has a single run.
+    graph = graph_with([(0, 1), (2, 3), (0, 3)], {3: 1})
+    graph.collapse_aliases()
+    assert list(graph.edges) == [(0, 1), (2, 1), (0, 1)]
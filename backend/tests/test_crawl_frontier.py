@@ -0,0 +1,129 @@
+import pytest
+
+from app.services.crawl_frontier import CrawlFrontier, PageResult
+
+SEED = "https://example.com/"
+
+
+def url(path: str) -> str:
+    return f"https://example.com/{path}"
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    f = CrawlFrontier(str(tmp_path / "crawl_jobs.db"))
+    yield f
+    f.close()
+
+
+def test_claim_hands_out_seed_once(frontier):
+    crawl_id = frontier.create(SEED, max_hops=2, max_pages=10, same_domain_only=True)
+    assert frontier.claim(crawl_id, 10, lease=60) == [(0, SEED, 0)]
+    assert frontier.claim(crawl_id, 10, lease=60) == []
+    job = frontier.get(crawl_id)
+    assert (job.status, job.claimed, job.queued, frontier.outstanding(crawl_id)) == ("pending", 1, 0, 1)
+
+
+def test_complete_merges_links_into_frontier(frontier):
+    crawl_id = frontier.create(SEED, max_hops=2, max_pages=10, same_domain_only=True)
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(0, 0, links=[url("a"), url("b"), url("a")])])
+
+    job = frontier.get(crawl_id)
+    assert (job.status, job.discovered, job.done, job.queued, job.edges) == ("running", 3, 1, 2, 2)
+    assert frontier.claim(crawl_id, 10, lease=60) == [(1, url("a"), 1), (2, url("b"), 1)]
+
+    # Links found at max_hops are recorded but not fetched.
+    frontier.complete(crawl_id, [PageResult(1, 1, links=[url("c")]), PageResult(2, 1)])
+    assert frontier.claim(crawl_id, 10, lease=60) == []
+    assert frontier.outstanding(crawl_id) == 0
+    graph = frontier.load_graph(crawl_id)
+    assert list(graph.urls) == [SEED, url("a"), url("b"), url("c")]
+    assert sorted(graph.edges) == [(0, 1), (0, 2), (1, 3)]
+
+
+def test_shorter_path_unparks_node(frontier):
+    crawl_id = frontier.create(SEED, max_hops=2, max_pages=10, same_domain_only=True)
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(0, 0, links=[url("a")])])
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(1, 1, links=[url("deep")])])
+    assert frontier.claim(crawl_id, 10, lease=60) == []
+
+    # Reported again from the seed (e.g. by another process), one hop away.
+    frontier.complete(crawl_id, [PageResult(0, 0, links=[url("deep")])])
+    assert frontier.claim(crawl_id, 10, lease=60) == [(2, url("deep"), 1)]
+
+
+def test_same_digest_becomes_alias(frontier):
+    crawl_id = frontier.create(SEED, max_hops=3, max_pages=10, same_domain_only=True)
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(0, 0, links=[url("a"), url("b")])])
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [
+        PageResult(1, 1, links=[SEED], digest=b"same"),
+        # The copy's links are not expanded.
+        PageResult(2, 1, links=[url("c")], digest=b"same"),
+    ])
+
+    job = frontier.get(crawl_id)
+    assert (job.discovered, job.queued) == (3, 0)
+    graph = frontier.load_graph(crawl_id)
+    assert graph.alias == {2: 1}
+    # The seed's edge to the copy now points at the original.
+    assert sorted(graph.edges) == [(0, 1), (1, 0)]
+
+
+def test_full_at_depth_stops_discovery(frontier):
+    crawl_id = frontier.create(SEED, max_hops=3, max_pages=3, same_domain_only=True)
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(0, 0, links=[url("a"), url("b"), url("c")])])
+
+    # The graph filled up while expanding depth 0, so nothing deeper is fetched.
+    job = frontier.get(crawl_id)
+    assert (job.discovered, job.edges) == (3, 2)
+    assert frontier.claim(crawl_id, 10, lease=60) == []
+    assert frontier.outstanding(crawl_id) == 0
+
+
+def test_expired_lease_is_claimed_again(frontier):
+    crawl_id = frontier.create(SEED, max_hops=2, max_pages=10, same_domain_only=True)
+    assert frontier.claim(crawl_id, 10, lease=-1) == [(0, SEED, 0)]
+    assert frontier.claim(crawl_id, 10, lease=60) == [(0, SEED, 0)]
+
+
+def test_renew_keeps_claim(frontier):
+    crawl_id = frontier.create(SEED, max_hops=2, max_pages=10, same_domain_only=True)
+    frontier.claim(crawl_id, 10, lease=-1)
+    frontier.renew(crawl_id, [0], lease=60)
+    assert frontier.claim(crawl_id, 10, lease=60) == []
+
+
+def test_interrupt_keeps_results_and_releases_rest(frontier):
+    crawl_id = frontier.create(SEED, max_hops=3, max_pages=10, same_domain_only=True)
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(0, 0, links=[url("a"), url("b")])])
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.interrupt(crawl_id, [PageResult(1, 1, links=[url("c")])], [2])
+
+    job = frontier.get(crawl_id)
+    assert (job.status, job.done, job.claimed, job.queued) == ("interrupted", 2, 0, 2)
+    assert frontier.claim(crawl_id, 10, lease=60) == [(2, url("b"), 1), (3, url("c"), 2)]
+
+
+def test_graph_keeps_out_edges_contiguous(frontier):
+    crawl_id = frontier.create(SEED, max_hops=3, max_pages=20, same_domain_only=True)
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(0, 0, links=[url("a"), url("b")])])
+    frontier.claim(crawl_id, 10, lease=60)
+    # Completed in separate checkpoints, with 2 reported before 1.
+    frontier.complete(crawl_id, [PageResult(2, 1, links=[url("c"), url("a")], digest=b"b")])
+    frontier.complete(crawl_id, [PageResult(1, 1, links=[url("c"), SEED], digest=b"a")])
+    frontier.claim(crawl_id, 10, lease=60)
+    frontier.complete(crawl_id, [PageResult(3, 2, links=[SEED], digest=b"a")])
+
+    graph = frontier.load_graph(crawl_id)
+    sources = list(graph.edges.sources)
+    assert sources == sorted(sources)
+    assert graph.alias == {3: 1}
+    assert list(graph.edges) == [(0, 1), (0, 2), (1, 0), (2, 1)]
@@ -0,0 +1,53 @@
+import os
+
+from app.services.fetch_cache import FetchCache
+
+
+def fill(cache, count, size=100):
+    for i in range(count):
+        cache.put(f"https://example.com/{i}", 200, os.urandom(size), "utf-8", None, None)
+
+
+def test_evicts_oldest_past_max_entries(tmp_path):
+    cache = FetchCache(str(tmp_path / "cache.db"), freshness=60, max_entries=10)
+    fill(cache, 11)
+    # Evicted down to 90% of the limit, oldest first.
+    assert cache.get("https://example.com/0") is None
+    assert cache.get("https://example.com/1") is None
+    assert cache.get("https://example.com/2") is not None
+    assert cache._totals()[0] == 9
+    cache.close()
+
+
+def test_evicts_past_max_bytes(tmp_path):
+    cache = FetchCache(str(tmp_path / "cache.db"), freshness=60, max_bytes=5000)
+    fill(cache, 100, size=1000)
+    entries, stored = cache._totals()
+    assert stored <= 5000
+    assert cache.get("https://example.com/99") is not None
+    assert entries < 100
+    cache.close()
+
+
+def test_overwrite_does_not_grow_totals(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = FetchCache(path, freshness=60, max_entries=2)
+    for _ in range(5):
+        cache.put("https://example.com/", 200, b"<html></html>", None, None, None)
+    cache.put("https://example.com/other", 200, b"<html></html>", None, None, None)
+    assert cache._totals()[0] == 2
+    cache.close()
+    # Totals are recounted when the file is opened again.
+    reopened = FetchCache(path, freshness=60, max_entries=2)
+    assert reopened._entries == 2
+    reopened.close()
+
+
+def test_is_fresh(tmp_path):
+    cache = FetchCache(str(tmp_path / "cache.db"), freshness=60)
+    fill(cache, 1)
+    page = cache.get("https://example.com/0")
+    assert cache.is_fresh(page)
+    page.fetched_at -= 120
+    assert not cache.is_fresh(page)
+    cache.close()
@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.html_parser import available_engines, get_engine
+from app.services.scraper import extract_elements
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+# Fixture page -> selectors whose output every engine must reproduce exactly.
+CORPUS = {
+    "products.html": [
+        ".product .name", ".price", "button.buy", "a[href]", "li.product, .featured",
+        ".stock", "title", "script", "h2, .price, h2 a",
+    ],
+    "article.html": [
+        "p", "article", "#post .lead", "a[rel]", "img", "code", "blockquote span",
+        "noscript", "time", "style, script",
+    ],
+    "table.html": [
+        "tr.row", "td.team", "td.pts, td.date", "input", "option", "select", "textarea",
+        "caption, th",
+    ],
+    "xhtml.html": [".item .title", "a", "div.item, p.title"],
+}
+
+OTHER_ENGINES = [name for name in available_engines() if name != "bs4"]
+
+
+def _extract(html, selector, engine, **kwargs):
+    return [
+        (e["tag_name"], e["text_content"], e["attributes"], e["selector_name"], e["row_index"])
+        for e in extract_elements(html, selector, engine=engine, **kwargs)
+    ]
+
+
+@pytest.mark.parametrize("engine", OTHER_ENGINES)
+@pytest.mark.parametrize(
+    "fixture,selector",
+    [(fixture, selector) for fixture, selectors in CORPUS.items() for selector in selectors],
+)
+def test_engine_matches_bs4(engine, fixture, selector):
+    html = (FIXTURES / fixture).read_text(encoding="utf-8")
+    assert _extract(html, selector, engine) == _extract(html, selector, "bs4")
+
+
+@pytest.mark.parametrize("engine", OTHER_ENGINES)
+def test_engine_matches_bs4_with_container(engine):
+    html = (FIXTURES / "products.html").read_text(encoding="utf-8")
+    fields = {"name": ".name", "price": ".price", "buy": "button"}
+    assert (
+        _extract(html, None, engine, fields=fields, container=".product")
+        == _extract(html, None, "bs4", fields=fields, container=".product")
+    )
+
+
+@pytest.mark.parametrize("engine", OTHER_ENGINES)
+def test_malformed_markup_matches_same_elements(engine):
+    # html.parser does not build HTML5 trees, so texts may differ on broken markup,
+    # but the same elements are found.
+    html = (FIXTURES / "malformed.html").read_text(encoding="utf-8")
+    for selector in (".card", "h3.t", "p.body", "li", ".price"):
+        ours = [(t, a) for t, _, a, _, _ in _extract(html, selector, engine)]
+        theirs = [(t, a) for t, _, a, _, _ in _extract(html, selector, "bs4")]
+        assert ours == theirs
+
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_selector_group_returns_each_node_once_in_document_order(engine):
+    html = '<div class="r">x</div><p class="r">y</p>'
+    assert [e[0] for e in _extract(html, "p, div, .r", engine)] == ["div", "p"]
+
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_text_skips_script_style_and_template(engine):
+    html = "<div>a<script>var x;</script><style>p{}</style><template><p>t</p></template>b</div>"
+    elements = _extract(html, "div, script, p", engine)
+    assert [(tag, text) for tag, text, *_ in elements] == [("div", "ab"), ("script", "var x;")]
+
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_boolean_attributes_are_empty(engine):
+    html = '<input disabled name="q"><option selected="selected" value="disabled">'
+    attrs = [e[2] for e in _extract(html, "input, option", engine)]
+    assert attrs == [{"disabled": "", "name": "q"}, {"selected": "", "value": "disabled"}]
+
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_xml_declaration(engine):
+    html = (FIXTURES / "xhtml.html").read_text(encoding="utf-8")
+    assert get_engine(engine).links(html) == ["one.html", "two.html"]
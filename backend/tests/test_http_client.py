@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+
+from app.core.config import settings
+from app.services import http_client
+
+
+def test_async_host_slot_limits_and_prunes():
+    limit = settings.HTTP_MAX_CONNECTIONS_PER_HOST
+    active = {host: 0 for host in range(3)}
+    peak = dict(active)
+
+    async def request(host, i):
+        async with http_client.async_host_slot(f"https://h{host}.test/{i}"):
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+
+    async def main():
+        await asyncio.gather(*(request(i % 3, i) for i in range(limit * 6)))
+
+    asyncio.run(main())
+    assert peak == {host: limit for host in range(3)}
+    assert http_client._async_host_sems == {}
+
+
+def test_host_slot_limits_and_prunes():
+    limit = settings.HTTP_MAX_CONNECTIONS_PER_HOST
+    active = peak = 0
+    counter = threading.Lock()
+
+    def request():
+        nonlocal active, peak
+        with http_client.host_slot("https://example.test/page"):
+            with counter:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with counter:
+                active -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(limit * 3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == limit
+    assert http_client._host_sems == {}
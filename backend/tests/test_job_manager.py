@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services import crawl_frontier, link_graph
+from app.services.crawl_frontier import CLAIMED
+from app.services.job_manager import CANCELLED, RUNNING, JobManager
+
+N = 400
+
+
+async def slow_handler(request):
+    path = request.url.path
+    if path == "/robots.txt":
+        return httpx.Response(404)
+    i = 0 if path == "/" else int(path.rsplit("/", 1)[1])
+    await asyncio.sleep(0.05)
+    links = "".join(f'<a href="/p/{j}">{j}</a>' for j in range(10 * i + 1, min(10 * i + 11, N)))
+    return httpx.Response(200, text=f"<html><body>{links}</body></html>", headers={"content-type": "text/html"})
+
+
+@pytest.fixture
+def crawl_env(monkeypatch, tmp_path):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(slow_handler))
+    monkeypatch.setattr(link_graph, "get_async_http_client", lambda: client)
+    monkeypatch.setattr(settings, "CRAWL_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CRAWL_PARSE_WORKERS", 0)
+    monkeypatch.setattr(settings, "CRAWL_MIN_HOST_DELAY", 0.0)
+    monkeypatch.setattr(settings, "CRAWL_JOBS_PATH", str(tmp_path / "crawl_jobs.db"))
+    yield
+    crawl_frontier.close_crawl_frontier()
+
+
+def test_shutdown_waits_for_cancelled_crawl_to_release_claims(crawl_env):
+    crawl = link_graph.create_crawl_job("http://site.test/", 3, N, True)
+    manager = JobManager(max_running=2, max_running_per_client=2, max_pending_per_client=2, result_ttl=60)
+
+    async def main():
+        job = manager.submit("crawl", "client", lambda job: link_graph.run_crawl_job(crawl.crawl_id))
+        await asyncio.sleep(0.5)
+        assert job.status == RUNNING
+        await manager.shutdown()
+        # Closed right after shutdown, as the app lifespan does.
+        crawl_frontier.close_crawl_frontier()
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == CANCELLED
+
+    frontier = crawl_frontier.get_crawl_frontier()
+    state = frontier.get(crawl.crawl_id)
+    assert state.status == "interrupted"
+    assert state.done > 1
+    assert frontier._conn.execute(
+        "SELECT COUNT(*) FROM crawl_nodes WHERE crawl_id = ? AND state = ?", (crawl.crawl_id, CLAIMED)
+    ).fetchone()[0] == 0
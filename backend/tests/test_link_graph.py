@@ -0,0 +1,160 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services import crawl_frontier, link_graph
+from app.services.fetch_cache import FetchCache
+
+SEED = "http://site.test/"
+# Page i links to pages 2i+1 and 2i+2.
+N = 15
+
+
+def handler(request):
+    path = request.url.path
+    if path == "/robots.txt":
+        return httpx.Response(404)
+    i = 0 if path == "/" else int(path.rsplit("/", 1)[1])
+    links = "".join(f'<a href="/p/{j}">{j}</a>' for j in (2 * i + 1, 2 * i + 2) if j < N)
+    return httpx.Response(200, text=f"<html><body>{links}</body></html>", headers={"content-type": "text/html"})
+
+
+@pytest.fixture
+def crawl_env(monkeypatch, tmp_path):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(link_graph, "get_async_http_client", lambda: client)
+    monkeypatch.setattr(settings, "CRAWL_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CRAWL_PARSE_WORKERS", 0)
+    monkeypatch.setattr(settings, "CRAWL_MIN_HOST_DELAY", 0.0)
+    monkeypatch.setattr(settings, "CRAWL_JOBS_PATH", str(tmp_path / "crawl_jobs.db"))
+
+    # Parsing page 1 blows up; its subtree (3, 4, 7-10) is never discovered.
+    parse_page = link_graph._parse_page
+
+    async def failing_parse_page(url, node, fetched, content, stats):
+        if url.endswith("/p/1"):
+            raise RuntimeError("parser bug")
+        return await parse_page(url, node, fetched, content, stats)
+
+    monkeypatch.setattr(link_graph, "_parse_page", failing_parse_page)
+    yield
+    crawl_frontier.close_crawl_frontier()
+
+
+def test_link_graph_worker_survives_item_errors(crawl_env):
+    stats = link_graph.CrawlStats()
+    graph = asyncio.run(link_graph.crawl_link_graph(SEED, 4, 100, True, stats=stats))
+    assert stats.worker_errors == 1
+    assert len(graph.urls) == N - 6
+
+
+def test_crawl_job_worker_survives_item_errors(crawl_env):
+    stats = link_graph.CrawlStats()
+    job = link_graph.create_crawl_job(SEED, 4, 100, True)
+    graph = asyncio.run(asyncio.wait_for(link_graph.run_crawl_job(job.crawl_id, stats=stats), 30))
+    assert stats.worker_errors == 1
+    assert len(graph.urls) == N - 6
+    job = crawl_frontier.get_crawl_frontier().get(job.crawl_id)
+    assert (job.status, job.claimed, job.queued) == ("done", 0, 0)
+
+
+def test_crawl_job_claims_past_a_slow_page(crawl_env, monkeypatch):
+    # Page 1 only answers once page 6 has been fetched, which is discovered through
+    # page 2 of the same batch: waiting for the whole batch before claiming more
+    # would never finish.
+    fetched_6 = asyncio.Event()
+
+    async def slow_handler(request):
+        if request.url.path == "/p/1":
+            await fetched_6.wait()
+        elif request.url.path == "/p/6":
+            fetched_6.set()
+        return handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(slow_handler))
+    monkeypatch.setattr(link_graph, "get_async_http_client", lambda: client)
+    monkeypatch.setattr(settings, "CRAWL_JOB_CLAIM_BATCH", 4)
+    job = link_graph.create_crawl_job(SEED, 4, 100, True)
+    graph = asyncio.run(asyncio.wait_for(link_graph.run_crawl_job(job.crawl_id), 30))
+    assert len(graph.urls) == N - 6
+
+
+def test_stream_holds_crawl_back_for_slow_client(crawl_env, monkeypatch):
+    # Each worker finishes the page it has before waiting, so use few of them.
+    monkeypatch.setattr(link_graph, "MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(link_graph, "STREAM_EVENT_BUFFER", 2)
+    pages = []
+
+    def counting_handler(request):
+        if request.url.path != "/robots.txt":
+            pages.append(request.url.path)
+        return handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(counting_handler))
+    monkeypatch.setattr(link_graph, "get_async_http_client", lambda: client)
+
+    async def consume():
+        stream = link_graph.stream_graph(SEED, 4, 100, True, progress_interval=60)
+        frames = [await stream.__anext__()]
+        await asyncio.sleep(0.2)
+        fetched_while_stalled = len(pages)
+        frames += [frame async for frame in stream]
+        return fetched_while_stalled, frames
+
+    fetched_while_stalled, frames = asyncio.run(asyncio.wait_for(consume(), 30))
+    assert fetched_while_stalled < len(pages) == N - 6
+    seen = set()
+    for frame in frames:
+        if frame["type"] == "node":
+            seen.add(frame["id"])
+        elif frame["type"] == "edge":
+            assert {frame["source"], frame["target"]} <= seen
+    assert frames[-1]["type"] == "pagerank"
+
+
+def test_stale_cache_entry_is_read_once_and_revalidated(crawl_env, monkeypatch, tmp_path):
+    def etag_handler(request):
+        etag = f'"{request.url.path}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        response = handler(request)
+        response.headers["etag"] = etag
+        return response
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(etag_handler))
+    monkeypatch.setattr(link_graph, "get_async_http_client", lambda: client)
+    cache = FetchCache(str(tmp_path / "cache.db"), freshness=3600)
+    monkeypatch.setattr(link_graph, "get_fetch_cache", lambda: cache)
+    asyncio.run(link_graph.crawl_link_graph(SEED, 4, 100, True))
+
+    cache.freshness = 0
+    reads = []
+    get = cache.get
+    monkeypatch.setattr(cache, "get", lambda url: reads.append(url) or get(url))
+    stats = link_graph.CrawlStats()
+    graph = asyncio.run(link_graph.crawl_link_graph(SEED, 4, 100, True, stats=stats))
+    assert len(graph.urls) == N - 6
+    assert sorted(reads) == sorted(set(reads))
+    assert stats.cache_revalidated == stats.pages_fetched == len(reads)
+    cache.close()
+
+
+def test_body_ending_on_a_chunk_at_the_cap_is_truncated(monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_MAX_PAGE_BYTES", 10)
+
+    async def chunks():
+        yield b"<html>1234"
+        yield b"5678</html>"
+
+    def chunked_handler(request):
+        return httpx.Response(200, content=chunks(), headers={"content-type": "text/html"})
+
+    async def fetch():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(chunked_handler)) as client:
+            return await link_graph._fetch_html(client, SEED)
+
+    fetched = asyncio.run(fetch())
+    assert fetched.body == b"<html>1234"
+    assert fetched.truncated
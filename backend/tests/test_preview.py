@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from app.services import preview
+from app.services.render_queue import RenderQueue
+
+
+def test_same_page_requests_share_one_queue_slot(monkeypatch):
+    queue = RenderQueue(workers=2, max_queue=2)
+    renders = []
+
+    def render(url, profile, deadline=None):
+        renders.append(url)
+        time.sleep(0.2)
+        return f"<html>{url}</html>"
+
+    monkeypatch.setattr(preview, "get_render_queue", lambda: queue)
+    monkeypatch.setattr(preview, "get_preview_html", render)
+    profile = preview.default_render_profile()
+
+    async def main():
+        same = [preview.render_preview_html("https://a.test/", profile, 5) for _ in range(4)]
+        await asyncio.sleep(0)
+        # Would get RenderQueueFull if every request above held a slot.
+        other = [preview.render_preview_html(f"https://b{i}.test/", profile, 5) for i in range(3)]
+        return await asyncio.gather(*same, *other)
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        queue.shutdown()
+    assert results[:4] == ["<html>https://a.test/</html>"] * 4
+    assert sorted(renders) == ["https://a.test/", "https://b0.test/", "https://b1.test/", "https://b2.test/"]
+    assert preview._inflight == {}
+
+
+def test_render_continues_when_leader_is_cancelled(monkeypatch):
+    queue = RenderQueue(workers=1, max_queue=0)
+
+    def render(url, profile, deadline=None):
+        time.sleep(0.1)
+        return "done"
+
+    monkeypatch.setattr(preview, "get_render_queue", lambda: queue)
+    monkeypatch.setattr(preview, "get_preview_html", render)
+    profile = preview.default_render_profile()
+
+    async def main():
+        leader = asyncio.ensure_future(preview.render_preview_html("https://a.test/", profile, 5))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(preview.render_preview_html("https://a.test/", profile, 5))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    try:
+        assert asyncio.run(main()) == "done"
+    finally:
+        queue.shutdown()
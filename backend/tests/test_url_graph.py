@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.services.url_graph import FingerprintInterner, UrlInterner, fingerprint_bits
+
+URLS = [f"https://example.com/{i % 7}/page-{i}?q=é" for i in range(2000)]
+
+
+@pytest.mark.parametrize("make", [UrlInterner, lambda: FingerprintInterner(len(URLS), 1e-6)])
+def test_interners_assign_dense_ids(make):
+    interner = make()
+    assert [interner.intern(u) for u in URLS] == [(i, True) for i in range(len(URLS))]
+    assert interner.intern(URLS[5]) == (5, False)
+    assert interner.get("https://example.com/missing") is None
+    assert list(interner) == URLS
+    assert interner.url(1999) == URLS[1999]
+
+
+def test_fingerprint_bits():
+    assert fingerprint_bits(1_000_000, 1e-6) == 40
+    assert fingerprint_bits(1, 0.5) == 16
+    with pytest.raises(ValueError):
+        fingerprint_bits(10, 0)
+
+
+def test_fingerprints_do_not_depend_on_hash_seed():
+    code = (
+        "from app.services.url_graph import FingerprintInterner;"
+        "print(FingerprintInterner(1000, 1e-6)._fingerprint('https://example.com/a'))"
+    )
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            cwd=os.path.join(os.path.dirname(__file__), ".."),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert len(outputs) == 1